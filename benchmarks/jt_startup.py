@@ -0,0 +1,59 @@
+"""Cold-start benchmark of the `jt` CLI.
+
+Loads the `jt` script in fresh interpreters, without running any command, and fails
+if the median time exceeds the budget or if a heavy dependency gets imported at startup.
+Those must only be imported by the commands that use them.
+
+    python benchmarks/jt_startup.py --budget 0.3
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+JT_SCRIPT = Path(__file__).resolve().parent.parent / "bin" / "jt"
+
+HEAVY_MODULES = ["pandas", "numpy", "submitit", "rich.table", "concurrent.futures"]
+
+_LOAD_JT = f"import runpy; runpy.run_path({str(JT_SCRIPT)!r}, run_name='jt_startup')"
+
+
+def time_startup(repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", _LOAD_JT], check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def imported_heavy_modules() -> list:
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _LOAD_JT],
+        check=True,
+        stderr=subprocess.PIPE,
+        text=True,
+    ).stderr
+    imported = {line.rsplit("|", 1)[-1].strip() for line in stderr.splitlines()}
+    return [module for module in HEAVY_MODULES if module in imported]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget", type=float, default=0.3, help="Max median startup time, in seconds.")
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    median = time_startup(args.repeats)
+    print(f"jt startup: {median * 1000:.1f} ms (budget: {args.budget * 1000:.0f} ms)")
+    heavy_modules = imported_heavy_modules()
+    if heavy_modules:
+        print(f"Heavy modules imported at startup: {', '.join(heavy_modules)}")
+
+    sys.exit(1 if median > args.budget or heavy_modules else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -29,5 +29,6 @@ setuptools.setup(
         "tqdm>=4.0.0",
         "scandir>=1.10.0",
     ],
+    extras_require={"parquet": ["pyarrow>=7.0.0"]},
     python_requires=">=3.8",
 )
@@ -1,8 +1,24 @@
-from submititnow.experiment_lib import Experiment
-from submititnow.options import (
-    add_submititnow_arguments,
-    add_slurm_arguments,
-    get_slurm_params,
-)
+import importlib
 
 __version__ = "0.9.1"
+
+# The public API is imported on first access, so that the `jt` and `slaunch` tools
+# do not pay for importing submitit and the launching machinery on every call.
+_LAZY_ATTRIBUTES = {
+    "Experiment": "submititnow.experiment_lib",
+    "add_submititnow_arguments": "submititnow.options",
+    "add_slurm_arguments": "submititnow.options",
+    "get_slurm_params": "submititnow.options",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted([*globals(), *_LAZY_ATTRIBUTES])
@@ -0,0 +1,57 @@
+import sys
+from typing import Any, Callable, Dict, Optional
+
+from submitit.helpers import Checkpointable, DelayedSubmission
+
+from submititnow.jt.logs import requeue_log_prefix
+
+# State dict of the job running in this process, set by `CheckpointableJob`.
+_job_state: Optional[Dict[str, Any]] = None
+
+
+def job_state() -> Dict[str, Any]:
+    """Returns the state dict of the running job, as it was when the job was last preempted or timed out.
+
+    A job launched with checkpointing keeps its progress (e.g. the last epoch, the path of
+    its last model checkpoint) in this dict, and resumes from it after a requeue. It starts
+    empty, and is pickled with the job: keep it small. Outside of a checkpointed job, a
+    dict that is never saved is returned.
+    """
+    global _job_state
+    if _job_state is None:
+        _job_state = {}
+    return _job_state
+
+
+class CheckpointableJob(Checkpointable):
+    """Requeues a job with its `job_state` when it is preempted or times out.
+
+    submitit calls `checkpoint` on the signal SLURM sends before preempting or killing
+    the job, and requeues it with the returned state. A job times out at most
+    `max_num_timeout` times (an executor parameter), preemptions are not counted.
+    """
+
+    def __init__(self, job_func: Callable):
+        self.job_func = job_func
+        self.state: Dict[str, Any] = {}
+        self.requeues = 0
+        # Keep the function names, `Experiment` describes jobs by them.
+        self.__module__ = job_func.__module__
+        self.__qualname__ = job_func.__qualname__
+
+    def __call__(self, *args, **kwargs):
+        global _job_state
+        if self.requeues:
+            # `jt jobs` reads the requeues of each job from the out log, and only trusts
+            # the SLURM errors logged after this line in the err log.
+            print(f"{requeue_log_prefix()}{self.requeues}", flush=True)
+            print(f"{requeue_log_prefix()}{self.requeues}", file=sys.stderr, flush=True)
+        _job_state = self.state
+        try:
+            return self.job_func(*args, **kwargs)
+        finally:
+            _job_state = None
+
+    def checkpoint(self, *args, **kwargs) -> DelayedSubmission:
+        self.requeues += 1
+        return super().checkpoint(*args, **kwargs)
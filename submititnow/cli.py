@@ -1,34 +1,114 @@
 from __future__ import annotations
-import io
 import time
+from collections import Counter
 
 from rich import print as rich_print
+from rich.console import Console
 from rich.live import Live
 from rich.table import Table
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from submititnow.jt import logs
+from submititnow.jt.engine import MAX_POLL_INTERVAL, MIN_POLL_INTERVAL, run_sync
+from submititnow.jt.scheduler import take_snapshot_async
 
 if TYPE_CHECKING:
     from submititnow.experiment_lib import Experiment
 
 
-def show_file_content(filepath: str):
+def show_file_content(
+    filepath: str,
+    head: Optional[int] = None,
+    tail: Optional[int] = None,
+    follow: bool = False,
+):
     rich_print(
         "[bold bright_yellow]Reading file:[/bold bright_yellow] [bold cyan]{}[/bold cyan]\n".format(
             filepath
         )
     )
-    with open(filepath, "r", newline="") as fp:
-        text = fp.read()
-        for line in text.split("\n"):
-            line_buffer = io.StringIO()
-            for chunks in line.split("\r"):
-                line_buffer.seek(0)
-                line_buffer.write(chunks)
-            rich_print(line_buffer.getvalue())
+    console = Console()
+    try:
+        for line in logs.stream_lines(filepath, head=head, tail=tail, follow=follow):
+            console.print(line, markup=False, emoji=False, soft_wrap=True)
+    except KeyboardInterrupt:
+        pass
+
+
+# Larger launches are collapsed into per-state job counts unless expanded.
+MAX_EXPANDED_ROWS = 20
+
+STATE_COLORS = {
+    "UNKNOWN": "dark_orange",
+    "PENDING": "yellow",
+    "RUNNING": "bright_green",
+    "COMPLETED": "bold green4",
+    "FAILED": "bold red",
+}
+
+_QUEUED_STATES = {"UNKNOWN", "PENDING", "CONFIGURING", "REQUEUED"}
+_ACTIVE_STATES = {"RUNNING", "COMPLETING", "SUSPENDED", "RESIZING", "STOPPED"}
+
+WAITING_STATES = {
+    "none": set(),
+    "submitted": {"UNKNOWN"},
+    "running": _QUEUED_STATES,
+    "done": _QUEUED_STATES | _ACTIVE_STATES,
+}
+
+
+def _fetch_job_states(exp: Experiment) -> Dict[str, Dict[str, str]]:
+    """Returns the scheduler info of all the jobs of `exp`, from a single scheduler query."""
+    snapshot = run_sync(take_snapshot_async(exp.jobs))
+    return {job_id: snapshot.get_info(job_id) for job_id in exp.jobs}
+
+
+def _job_state(job_info: Dict[str, str]) -> str:
+    return job_info.get("State") or "UNKNOWN"
+
+
+def _decorate_state(job_state: str) -> str:
+    return f"[{STATE_COLORS.get(job_state, 'bold medium_violet_red')}]{job_state}"
+
+
+def _next_poll_interval(interval: float, query_time: float, changed: bool) -> float:
+    """Polls eagerly while job states change and backs off while they don't, or when the scheduler is slow."""
+    interval = MIN_POLL_INTERVAL if changed else min(interval * 1.5, MAX_POLL_INTERVAL)
+    return max(interval, 10 * query_time)
+
+
+def _generate_summary_table(exp: Experiment, jobs_info: Dict[str, Dict[str, str]]):
+    table = Table(
+        show_header=True,
+        highlight=True,
+        caption=f"{exp.job_function_description}",
+    )
+    table.add_column("State")
+    table.add_column("Jobs", justify="right", style="bold cyan")
+    table.add_column("Nodelist")
+
+    counts = Counter(map(_job_state, jobs_info.values()))
+    for job_state, count in counts.most_common():
+        nodes = {
+            job_info["NodeList"]
+            for job_info in jobs_info.values()
+            if _job_state(job_info) == job_state and job_info.get("NodeList")
+        }
+        nodes.discard("(null)")
+        nodelist = ", ".join(sorted(nodes)[:5]) + (", ..." if len(nodes) > 5 else "")
+        table.add_row(_decorate_state(job_state), str(count), nodelist)
+    return table
+
 
+def _generate_console_table(
+    exp: Experiment,
+    jobs_info: Dict[str, Dict[str, str]],
+    expanded: bool = False,
+):
+    if not expanded and len(exp.jobs) > MAX_EXPANDED_ROWS:
+        return _generate_summary_table(exp, jobs_info)
 
-def _generate_console_table(exp: Experiment):
     table = Table(show_header=True, highlight=True)
     table.add_column("JobID", justify="right", style="bold cyan", no_wrap=True)
     table.add_column("Experiment Configs")
@@ -36,26 +116,13 @@ def _generate_console_table(exp: Experiment):
     table.add_column("State")
     table.add_column("Nodelist")
 
-    for job_id, job in exp.jobs.items():
-        exp_description = exp.job_function_description
+    exp_description = exp.job_function_description
+    for job_id in exp.jobs:
         job_params_info = exp.job_descriptions[job_id]
-        jobs_info = job.get_info()
-        if not jobs_info:
-            job_state = "UNKNOWN"
-            nodelist = f"[dark_orange]UNKNOWN"
-        else:
-            job_state = jobs_info["State"]
-            nodelist = jobs_info["NodeList"]
-
-        state_color = {
-            "UNKNOWN": "dark_orange",
-            "PENDING": "yellow",
-            "RUNNING": "bright_green",
-            "COMPLETED": "bold green4",
-            "FAILED": "bold red",
-        }[job_state]
-
-        job_state_decorated = f"[{state_color}]{job_state}"
+        job_info = jobs_info.get(job_id, {})
+        job_state = _job_state(job_info)
+        nodelist = job_info.get("NodeList") or "[dark_orange]UNKNOWN"
+
         # if job_state == 'FAILED':
         #     job_state_decorated = ":skull: " + job_state_decorated
         # if job_state == 'COMPLETED':
@@ -64,15 +131,23 @@ def _generate_console_table(exp: Experiment):
             f"{job_id}",
             f"{exp_description}",
             job_params_info,
-            job_state_decorated,
+            _decorate_state(job_state),
             nodelist,
         )
         table.add_row(*row_text)
     return table
 
 
-def _display_job_submission_status_on_console(exp: Experiment, wait_until: str):
+def _display_job_submission_status_on_console(
+    exp: Experiment, wait_until: str, expanded: bool = False
+):
     print()
+    if exp.cached_jobs:
+        num_cached = len(exp.cached_jobs)
+        rich_print(f" \t:recycle: [bold]Reused {num_cached} completed job(s)[/bold] :recycle: ")
+        print()
+    if not exp.jobs:
+        return
     # fmt: off
     rich_print(f" \t:rocket: [bold]Launched {len(exp.jobs)} job(s)[/bold] :rocket: ")
     print()
@@ -89,25 +164,73 @@ def _display_job_submission_status_on_console(exp: Experiment, wait_until: str):
     rich_print(f"\t[bold bright_white]jt jobs {exp.exp_name} {exp.exp_id}[/bold bright_white]\n")
     # fmt: on
 
-    waiting_states = set()
-    if wait_until == "submitted":
-        waiting_states = {"UNKNOWN"}
-    if wait_until == "running":
-        waiting_states = {"UNKNOWN", "PENDING"}
-    if wait_until == "done":
-        waiting_states = {"UNKNOWN", "PENDING", "RUNNING"}
-
-    with Live(_generate_console_table(exp), refresh_per_second=10) as live:
-        jobs_in_queue = {*exp.jobs.values()}
-        jobs_submitted = set()
-        wait_over = False
-        while not wait_over:
-            wait_over = True
-            for job in jobs_in_queue:
-                if job.state in waiting_states:
-                    wait_over = False
-                else:
-                    jobs_submitted.add(job)
-                live.update(_generate_console_table(exp))
-            jobs_in_queue = jobs_in_queue - jobs_submitted
-            time.sleep(0.1)
+    waiting_states = WAITING_STATES[wait_until]
+
+    jobs_info = _fetch_job_states(exp)
+    interval = MIN_POLL_INTERVAL
+    with Live(_generate_console_table(exp, jobs_info, expanded)) as live:
+        while any(_job_state(info) in waiting_states for info in jobs_info.values()):
+            time.sleep(interval)
+            start_time = time.monotonic()
+            new_jobs_info = _fetch_job_states(exp)
+            changed = any(
+                _job_state(new_jobs_info[job_id]) != _job_state(jobs_info[job_id])
+                for job_id in jobs_info
+            )
+            interval = _next_poll_interval(
+                interval, time.monotonic() - start_time, changed
+            )
+            jobs_info = new_jobs_info
+            live.update(_generate_console_table(exp, jobs_info, expanded))
+
+
+def _display_resubmission(
+    job_ids: List[str], retry_ids: List[str], failure: str, slurm_params: Dict[str, Any]
+):
+    print()
+    params = ", ".join(
+        f"{key}={slurm_params[key]}"
+        for key in ("slurm_mem", "mem_gb", "slurm_time", "timeout_min")
+        if slurm_params.get(key) is not None
+    )
+    rich_print(
+        f" \t:repeat: [bold]Resubmitted {len(job_ids)} job(s) that failed ({failure})[/bold]"
+        f" [dim]{params}[/dim]"
+    )
+    for job_id, retry_id in zip(job_ids, retry_ids):
+        rich_print(f"\t\t[bold bright_blue]{job_id}[/bold bright_blue] -> [bold bright_cyan]{retry_id}")
+
+
+def _display_right_sizing(
+    suggestions: Dict[str, Any], slurm_params: Dict[str, Any], mode: str, num_past_jobs: int
+):
+    rich_print(
+        f" \t:straight_ruler: [bold]Resources recommended by {num_past_jobs} past job(s)[/bold]"
+        f" [dim](right-sizing: {mode})[/dim]"
+    )
+    for key, (requested, recommended) in suggestions.items():
+        applied = slurm_params.get(key) != requested
+        rich_print(
+            f"\t\t[bold]{key}[/bold]: requested {requested if requested is not None else '-'},"
+            f" recommended [bold bright_cyan]{recommended}[/bold bright_cyan]"
+            + (" [bold green](applied)[/bold green]" if applied else "")
+        )
+
+
+def _display_search_round(
+    round_index: int, num_configs: int, best, cancelled: Optional[int] = None
+):
+    print()
+    best_config = ", ".join(f"{key}={value}" for key, value in best.config.items()) if best else "-"
+    rich_print(
+        f" \t:mag: [bold]Search round {round_index}: {num_configs} configuration(s)[/bold]"
+        + (
+            f" [dim](target reached, {cancelled} job(s) cancelled)[/dim]"
+            if cancelled is not None
+            else ""
+        )
+    )
+    rich_print(
+        f"\t\tBest so far: [bold bright_cyan]{best_config}[/bold bright_cyan]"
+        f" -> [bold green]{best.metric if best else '-'}[/bold green]"
+    )
@@ -1,18 +1,101 @@
 import argparse
+import asyncio
 import datetime as dt
+import itertools
+import warnings
 from pathlib import Path
-from typing import List, Iterable, Optional, Callable, Any, Dict
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 import submitit
 
 from submititnow import cli
+from submititnow.checkpoint import CheckpointableJob
+from submititnow.packing import PackedJob
+from submititnow.retry import RetryPolicy
+from submititnow.rightsize import ResourceRecommender, RightSizing
+from submititnow.sweep import Sweep
+from submititnow.timing import TimedJob
 from submititnow.jt import utils
+from submititnow.jt.catalog import Catalog
+from submititnow.jt.engine import (
+    MAX_POLL_INTERVAL,
+    MIN_POLL_INTERVAL,
+    StateEngine,
+    has_reached,
+    iter_sync,
+    run_sync,
+)
+from submititnow.jt.index import JobFileIndex
+from submititnow.jt.results import (
+    CachedJob,
+    JobParamsStore,
+    ResultCache,
+    job_hash,
+    load_result,
+    source_version,
+    split_point,
+)
+from submititnow.jt.scheduler import SlurmBackend
+from submititnow.jt.states import failure_class, is_terminal_state
+from submititnow.jt.tracker import JobAttempt, TrackerStore, make_tracker_row
+
+
+# MaxArraySize of SLURM clusters that do not override it.
+DEFAULT_MAX_ARRAY_SIZE = 1000
 
 
 def _job_start_time(job: submitit.Job):
     return dt.datetime.fromtimestamp(job._start_time)
 
 
+def _chunked(
+    items: Iterable[Any], chunk_size: Optional[int]
+) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, chunk_size)):
+        yield chunk
+
+
+def _format_params(params: Dict[str, Any]) -> str:
+    tokens = []
+    for k, v in params.items():
+        token = f"{k}='{v}'" if isinstance(v, str) else f"{k}={v}"
+        tokens.append(token)
+    return ", ".join(tokens)
+
+
+def _split_common_params(job_params: Sequence[argparse.Namespace]):
+    """Splits the job parameters into the ones shared by all jobs and the keys that vary across jobs.
+
+    Every job is visited once, comparing its values against the running set of common values.
+    A `Sweep` already knows them without generating its jobs.
+    """
+    if isinstance(job_params, Sweep):
+        return job_params.common_params, job_params.varying_keys
+    if not job_params:
+        return {}, set()
+
+    common_params = dict(vars(job_params[0]))
+    varying_keys = set()
+    for param in job_params[1:]:
+        param_vars = vars(param)
+        for k in [k for k, v in common_params.items() if param_vars.get(k, v) != v]:
+            del common_params[k]
+            varying_keys.add(k)
+    return common_params, varying_keys
+
+
 class Experiment:
     def __init__(
         self,
@@ -21,40 +104,55 @@ class Experiment:
         job_params: Iterable[argparse.Namespace],
         job_desc_function: Optional[Callable] = None,
         submititnow_dir: Optional[str] = None,
+        code_version: Optional[str] = None,
     ):
         self.submititnow_dir = (
             Path(submititnow_dir) if submititnow_dir else utils.SUBMITITNOW_ROOT_DIR
         )
         self.exp_name = name
         self.job_func = job_func
-        self.job_params = list(job_params)
-        self.job_desc_function = job_desc_function or (lambda x: str(x))
+        self.job_params = job_params if isinstance(job_params, Sweep) else list(job_params)
+        self.common_params, self.varying_keys = _split_common_params(self.job_params)
+        self._job_function_description = self._describe_job_function()
+        self.job_desc_function = job_desc_function or self.describe_varying_params
+        # Without an explicit version, editing the job function's script runs its jobs again.
+        self.code_version = code_version if code_version is not None else source_version(job_func)
+        self.exp_id = None
         self.jobs = {}
         self.job_descriptions = {}
+        self.job_params_by_id = {}
+        self.cached_jobs = {}
         self.profile_handlers = {}
 
-    @property
-    def job_function_description(self):
+    def _describe_job_function(self):
         func_name = self.job_func.__module__ + "." + self.job_func.__qualname__
+        return f"{func_name}( {_format_params(self.common_params)} )"
 
-        common_params = vars(self.job_params[0])
-        for param in self.job_params[1:]:
-            for k, v in vars(param).items():
-                if k in common_params and v != common_params[k]:
-                    del common_params[k]
+    @property
+    def job_function_description(self):
+        return self._job_function_description
 
-        tokens = []
-        for k, v in common_params.items():
-            token = f"{k}='{v}'" if isinstance(v, str) else f"{k}={v}"
-            tokens.append(token)
-        return f"{func_name}( {', '.join(tokens)} )"
+    def describe_varying_params(self, job_param: argparse.Namespace) -> str:
+        """Describes a job by the parameters that vary across the jobs of the experiment."""
+        varying_params = {
+            k: v for k, v in vars(job_param).items() if k in self.varying_keys
+        }
+        return _format_params(varying_params) or "---"
 
     @property
     def exp_dir(self):
         return utils.EXPERIMENTS_ROOT_DIR / self.exp_name
 
+    @property
+    def db_file(self):
+        return self.exp_dir / "jt.db"
+
     @property
     def tracker_file(self):
+        return self.db_file
+
+    @property
+    def legacy_tracker_file(self):
         return self.exp_dir / "tracker.csv"
 
     @property
@@ -72,6 +170,14 @@ class Experiment:
         *,
         verbose: bool = True,
         wait_until: str = "submitted",
+        expand_jobs: bool = False,
+        max_array_size: Optional[int] = None,
+        tasks_per_job: int = 1,
+        pack_workers: int = 1,
+        skip_completed: bool = True,
+        retry: Optional[RetryPolicy] = None,
+        right_size: Optional[RightSizing] = None,
+        checkpoint: bool = False,
     ):
         """Launches the experiment on the cluster. If `wait_until` is None, the function returns immediately.
 
@@ -79,10 +185,38 @@ class Experiment:
             slurm_params (dict): Dictionary of slurm parameters.
             verbose: Boolean flag to print job status. Optional, defaults to True
             wait_until:. Defaults to 'submitted'. Options are 'none', 'submitted', 'running', 'done'
+            expand_jobs: Boolean flag to show one row per job even for large launches, which are
+                otherwise summarized by job state. Optional, defaults to False
+            max_array_size: Max number of jobs per SLURM job array. Larger experiments are submitted
+                as several arrays, tracked under the exp ID of the first one. Optional, defaults to
+                the `MaxArraySize` of the cluster
+            tasks_per_job: Number of job params run by each SLURM array task. Packing many short
+                jobs in a task saves the scheduler overhead of one task per job. Each of them is
+                still tracked as a job `<task ID>:<k>`. Optional, defaults to 1
+            pack_workers: Number of processes running the job params of a packed task in
+                parallel. Optional, defaults to 1
+            skip_completed: Boolean flag to only submit the jobs that never completed with the same
+                job function, parameters and `code_version` (by default, a hash of the job
+                function's source file). The completed ones are returned as
+                `CachedJob`s holding their previous result. Optional, defaults to True
+            retry: Policy resubmitting the jobs that fail (e.g. out of memory), with escalated
+                resources. The launch then blocks until every job is done. Optional, defaults to
+                None, never resubmitting
+            right_size: How the memory and time of the jobs are sized from the usage of the past
+                jobs of the experiment, once the profile handler applied. Optional, defaults to
+                None, submitting the requested resources as is
+            checkpoint: Boolean flag to requeue the jobs that are preempted or time out, resuming
+                from the state they keep in `submititnow.checkpoint.job_state()`. Not supported
+                with `tasks_per_job` > 1. Optional, defaults to False
 
         Returns:
-            list: List of SLURMJob objects
+            list: List of SLURMJob objects, one per array task (resubmissions included), followed
+                by the `CachedJob`s
         """
+        if tasks_per_job < 1:
+            raise ValueError(f"tasks_per_job must be at least 1, got {tasks_per_job}")
+        if checkpoint and tasks_per_job > 1:
+            raise ValueError("Checkpointing is not supported for packed jobs (tasks_per_job > 1)")
         if wait_until not in {"none", "submitted", "running", "done"}:
             raise ValueError(
                 f"wait_until must be one of 'none', 'submitted', 'running', 'done', got {wait_until}"
@@ -99,40 +233,369 @@ class Experiment:
                     f"Please register it using `experiment.register_profile_handler`, or use a valid profile. [Valid profiles: {list(self.profile_handlers.keys())}]"
                 )
 
+        if right_size is not None:
+            slurm_params = self._right_size(
+                slurm_params, right_size, tasks_per_job, pack_workers, verbose
+            )
+
         self.executor = submitit.AutoExecutor(self.logs_dir)
         self.executor.update_parameters(**slurm_params)
 
-        jobs = self.executor.map_array(self.job_func, self.job_params)
-        job_descriptions = map(self.job_desc_function, self.job_params)
+        if max_array_size is None and self.executor.cluster == "slurm":
+            max_array_size = SlurmBackend().max_array_size() or DEFAULT_MAX_ARRAY_SIZE
+
+        self.exp_id = None
+        self.slurm_params = slurm_params
+        self.job_slurm_params = {}
+        self.job_attempts = {}
+        self.cached_jobs = {}
+        self.result_cache = ResultCache(
+            self.db_file, JobFileIndex(self.logs_dir, self.db_file)
+        )
+        submit_options = dict(
+            max_array_size=max_array_size,
+            tasks_per_job=tasks_per_job,
+            pack_workers=pack_workers,
+            checkpoint=checkpoint,
+        )
+        try:
+            job_params = (
+                self._uncompleted_job_params(self.result_cache.completed_jobs())
+                if skip_completed
+                else self.job_params
+            )
+            jobs, _ = self._submit(job_params, **submit_options)
+
+            if verbose:
+                cli._display_job_submission_status_on_console(self, wait_until, expand_jobs)
+            if retry is not None:
+                jobs.extend(run_sync(self._resubmit_failures(retry, submit_options, verbose)))
+        finally:
+            self.result_cache.job_index.close()
+            self.result_cache.close()
+
+        return jobs + list(self.cached_jobs.values())
+
+    def _right_size(
+        self,
+        slurm_params: Dict[str, Any],
+        right_size: RightSizing,
+        tasks_per_job: int,
+        pack_workers: int,
+        verbose: bool,
+    ) -> Dict[str, Any]:
+        """Returns the SLURM parameters with the memory and time recommended by past jobs."""
+        exp = utils.JTExp(self.exp_name)
+        if not exp.exists():
+            return slurm_params
+        recommender = ResourceRecommender.from_history(exp, right_size.source)
+        peak_rss_mb, elapsed_min = recommender.recommend(self.job_params)
+        if tasks_per_job > 1:
+            # The points of a packed task run `pack_workers` at a time.
+            workers = min(pack_workers, tasks_per_job)
+            if peak_rss_mb is not None:
+                peak_rss_mb *= workers
+            if elapsed_min is not None:
+                elapsed_min *= -(-tasks_per_job // workers)
+        sized_params, suggestions = right_size.apply(slurm_params, peak_rss_mb, elapsed_min)
+        if verbose and suggestions:
+            cli._display_right_sizing(
+                suggestions, sized_params, right_size.mode, len(recommender.usages)
+            )
+        return sized_params
+
+    def _submit(
+        self,
+        job_params: Iterable[argparse.Namespace],
+        max_array_size: Optional[int],
+        tasks_per_job: int,
+        pack_workers: int,
+        checkpoint: bool = False,
+    ) -> Tuple[List[submitit.Job], List[str]]:
+        """Submits and tracks jobs, returns the submitted array tasks and the IDs of the jobs."""
+        jobs, job_ids = [], []
+        # Jobs are generated and submitted one array at a time, so that a lazy `Sweep`
+        # is never materialized as a whole.
+        if tasks_per_job == 1:
+            timed_job_func = TimedJob(self.job_func)
+            if checkpoint:
+                # submitit only checkpoints the function it runs, keep it outermost.
+                timed_job_func = CheckpointableJob(timed_job_func)
+            for chunk in _chunked(job_params, max_array_size):
+                chunk_jobs = self.executor.map_array(timed_job_func, chunk)
+                job_ids.extend(self._assign_jobs(chunk_jobs, chunk))
+                jobs.extend(chunk_jobs)
+            if checkpoint and self.exp_id is not None:
+                # `jt jobs` only reads the requeues of the jobs of checkpointed launches.
+                tracker = TrackerStore(self.tracker_file, self.legacy_tracker_file)
+                tracker.mark_checkpointed(self.exp_id)
+                tracker.close()
+        else:
+            packed_job_func = TimedJob(PackedJob(self.job_func, workers=pack_workers))
+            packs = _chunked(job_params, tasks_per_job)
+            for chunk in _chunked(packs, max_array_size):
+                chunk_jobs = self.executor.map_array(packed_job_func, chunk)
+                job_ids.extend(self._assign_packed_jobs(chunk_jobs, chunk))
+                jobs.extend(chunk_jobs)
+        return jobs, job_ids
+
+    async def _resubmit_failures(
+        self, retry: RetryPolicy, submit_options: Dict[str, Any], verbose: bool
+    ) -> List[submitit.Job]:
+        """Resubmits the jobs that fail per the `retry` policy until every job is done.
+
+        Returns the array tasks of the resubmissions.
+        """
+        engine = StateEngine(self.db_file, self.logs_dir)
+        pending = list(self.jobs)
+        interval = MIN_POLL_INTERVAL
+        new_jobs = []
+        try:
+            while pending:
+                statuses = await engine.probe(pending)
+                pending = [job_id for job_id in pending if not is_terminal_state(statuses[job_id])]
+                finished = len(pending) < len(statuses)
+                # Jobs escalated to the same parameters are resubmitted together.
+                resubmissions = {}
+                not_escalated = {}
+                for job_id, status in statuses.items():
+                    failure = failure_class(status)
+                    if failure is None or not retry.should_retry(
+                        failure, self.job_attempts.get(job_id, 1)
+                    ):
+                        continue
+                    slurm_params = retry.escalate(
+                        self.job_slurm_params.get(job_id, self.slurm_params), failure
+                    )
+                    if slurm_params is None:
+                        not_escalated.setdefault(failure, []).append(job_id)
+                        continue
+                    key = (failure, repr(sorted(slurm_params.items())))
+                    resubmissions.setdefault(key, (failure, slurm_params, []))[2].append(job_id)
+
+                for failure, job_ids in not_escalated.items():
+                    warnings.warn(
+                        f"Not resubmitting {len(job_ids)} job(s) that failed ({failure}):"
+                        f" none of their SLURM parameters can be escalated, {job_ids}"
+                    )
+
+                for failure, slurm_params, job_ids in resubmissions.values():
+                    jobs, retry_ids = self._resubmit(job_ids, failure, slurm_params, submit_options)
+                    if verbose:
+                        cli._display_resubmission(job_ids, retry_ids, failure, slurm_params)
+                    new_jobs.extend(jobs)
+                    pending.extend(retry_ids)
+
+                if pending:
+                    # Poll faster while jobs are finishing, back off otherwise.
+                    interval = (
+                        MIN_POLL_INTERVAL if finished else min(interval * 2, MAX_POLL_INTERVAL)
+                    )
+                    await asyncio.sleep(interval)
+        finally:
+            engine.close()
+        return new_jobs
+
+    def _resubmit(
+        self,
+        job_ids: List[str],
+        failure: str,
+        slurm_params: Dict[str, Any],
+        submit_options: Dict[str, Any],
+    ) -> Tuple[List[submitit.Job], List[str]]:
+        """Submits the next attempt of failed jobs with `slurm_params`, and tracks them as such."""
+        self.executor.update_parameters(**slurm_params)
+        jobs, retry_ids = self._submit(
+            [self.job_params_by_id[job_id] for job_id in job_ids], **submit_options
+        )
+        attempts = []
+        for job_id, retry_id in zip(job_ids, retry_ids):
+            attempt = self.job_attempts.get(job_id, 1) + 1
+            self.job_attempts[retry_id] = attempt
+            self.job_slurm_params[retry_id] = slurm_params
+            self.job_descriptions[retry_id] += f" (attempt {attempt})"
+            attempts.append(JobAttempt(retry_id, job_id, attempt, failure))
+        tracker = TrackerStore(self.tracker_file, self.legacy_tracker_file)
+        tracker.record_attempts(attempts)
+        tracker.close()
+        return jobs, retry_ids
+
+    async def as_completed(
+        self, until: str = "done", poll_interval: float = MIN_POLL_INTERVAL
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """Yields `(job_id, status)` as each launched job reaches `until`, see `StateEngine.watch`.
+
+        The jobs reused from previous launches come first, as COMPLETED.
+        """
+        has_reached("UNSUBMITTED", until)
+        for job_id in self.cached_jobs:
+            yield job_id, "COMPLETED"
+        engine = StateEngine(self.db_file, self.logs_dir)
+        try:
+            async for job_id, status in engine.watch(self.jobs, until, poll_interval):
+                yield job_id, status
+        finally:
+            engine.close()
+
+    def __aiter__(self) -> AsyncIterator[Tuple[str, str]]:
+        return self.as_completed()
+
+    async def wait(
+        self, until: str = "done", poll_interval: float = MIN_POLL_INTERVAL
+    ) -> Dict[str, str]:
+        """Waits until every launched job reached `until`, returns the status of each job."""
+        return {job_id: status async for job_id, status in self.as_completed(until, poll_interval)}
+
+    def wait_sync(
+        self, until: str = "done", poll_interval: float = MIN_POLL_INTERVAL
+    ) -> Dict[str, str]:
+        """Blocking version of `wait`."""
+        return run_sync(self.wait(until, poll_interval))
+
+    def iter_results(
+        self, as_completed: bool = True, poll_interval: float = MIN_POLL_INTERVAL
+    ) -> Iterator[Tuple[argparse.Namespace, Any]]:
+        """Yields the `(params, result)` of each job that completed successfully.
+
+        Args:
+            as_completed: Yield the results as the jobs finish. Otherwise, wait for all the
+                jobs and yield their results in launch order. Optional, defaults to True
+            poll_interval: Seconds between two probes of the jobs, backing off while none
+                of them finishes.
+        """
+        if as_completed:
+            statuses = iter_sync(self.as_completed("done", poll_interval))
+        else:
+            final_statuses = self.wait_sync("done", poll_interval)
+            statuses = ((job_id, final_statuses[job_id]) for job_id in self.job_params_by_id)
+        job_index = JobFileIndex(self.logs_dir, self.db_file)
+        try:
+            for job_id, status in statuses:
+                job_task, point = split_point(job_id)
+                result_path = job_index.lookup(job_task).get("result")
+                if status != "COMPLETED" or result_path is None:
+                    continue
+                completed, result = load_result(result_path, point)
+                if completed:
+                    yield self.job_params_by_id[job_id], result
+        finally:
+            statuses.close()
+            job_index.close()
 
-        self._assign_jobs(jobs, job_descriptions)
+    def _job_hash(self, job_param: argparse.Namespace) -> Optional[str]:
+        hash_ = job_hash(self.job_func, job_param, self.code_version)
+        if hash_ is None:
+            warnings.warn(
+                "Some job params have no stable encoding (e.g. objects without a __repr__):"
+                " these jobs are always run, and their results are never reused."
+            )
+        return hash_
 
-        if verbose:
-            cli._display_job_submission_status_on_console(self, wait_until)
+    def _uncompleted_job_params(
+        self, completed_jobs: Dict[str, CachedJob]
+    ) -> Iterator[argparse.Namespace]:
+        """Yields the job params that never completed, collecting the cached ones in `cached_jobs`.
 
-        return jobs
+        `completed_jobs` maps job hashes to their completed job, see `ResultCache.completed_jobs`.
+        """
+        for job_param in self.job_params:
+            cached_job = completed_jobs.get(self._job_hash(job_param))
+            if cached_job is None:
+                yield job_param
+            else:
+                self.cached_jobs[cached_job.job_id] = cached_job
+                self.job_params_by_id[cached_job.job_id] = job_param
 
-    def _assign_jobs(self, jobs: List[submitit.Job], job_descriptions: Iterable[str]):
-        self.exp_id = jobs[0].job_id.split("_")[0]
-        for job, description in zip(jobs, job_descriptions):
+    def _assign_jobs(
+        self, jobs: List[submitit.Job], job_params: List[argparse.Namespace]
+    ) -> List[str]:
+        if self.exp_id is None:
+            self.exp_id = jobs[0].job_id.split("_")[0]
+        job_ids = []
+        for job, job_param in zip(jobs, job_params):
             self.jobs[job.job_id] = job
-            self.job_descriptions[job.job_id] = description
-
-        for job in jobs:
-            self._update_tracker(job, self.job_descriptions[job.job_id])
-
-    def _assign_job(self, job: submitit.Job, description: str):
-        self._assign_jobs([job], [description])
-
-    def _update_tracker(self, job, job_desc):
-        job_start_time_str = str(_job_start_time(job)).split(".")[0]
-        self.tracker_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.tracker_file, "a") as fp:
-            row_items = [
-                job_start_time_str,
-                str(job.job_id),
-                job_desc,
-                self.job_function_description,
-            ]
-            fp.write("\t".join(row_items))
-            fp.write("\n")
+            self.job_descriptions[job.job_id] = self.job_desc_function(job_param)
+            self.job_params_by_id[job.job_id] = job_param
+            job_ids.append(job.job_id)
+
+        self._update_tracker(job_ids)
+        self._update_result_cache(job_ids, job_params)
+
+        self._update_catalog(job_ids)
+        self._update_job_index(jobs)
+        return job_ids
+
+    def _assign_packed_jobs(
+        self, jobs: List[submitit.Job], packs: List[List[argparse.Namespace]]
+    ) -> List[str]:
+        """Tracks every job params of packed array tasks as a job `<task ID>:<k>`."""
+        if self.exp_id is None:
+            self.exp_id = jobs[0].job_id.split("_")[0]
+        job_ids, job_params = [], []
+        for job, pack in zip(jobs, packs):
+            for point, job_param in enumerate(pack):
+                job_id = f"{job.job_id}:{point}"
+                self.jobs[job_id] = job
+                self.job_descriptions[job_id] = self.job_desc_function(job_param)
+                self.job_params_by_id[job_id] = job_param
+                job_ids.append(job_id)
+                job_params.append(job_param)
+
+        self._update_tracker(job_ids)
+        self._update_result_cache(job_ids, job_params)
+
+        self._update_catalog(job_ids)
+        self._update_job_index(jobs)
+        return job_ids
+
+    def _update_catalog(self, job_ids: List[str]):
+        # Every array of the launch (chunks of a large experiment, resubmissions) is
+        # recorded under its exp ID.
+        launched_at = min(_job_start_time(self.jobs[job_id]) for job_id in job_ids)
+        array_ids = dict.fromkeys(job_id.split(":")[0].split("_")[0] for job_id in job_ids)
+        catalog = Catalog(utils.CATALOG_FILE)
+        catalog.record_launch(
+            self.exp_id,
+            self.exp_name,
+            str(launched_at).split(".")[0],
+            len(job_ids),
+            array_ids,
+        )
+        catalog.close()
+
+    def _update_job_index(self, jobs: List[submitit.Job]):
+        job_index = JobFileIndex(self.logs_dir, self.db_file)
+        job_index.record_jobs(jobs)
+        job_index.close()
+
+    def _assign_job(self, job: submitit.Job, job_param: argparse.Namespace) -> str:
+        return self._assign_jobs([job], [job_param])[0]
+
+    def _update_result_cache(
+        self, job_ids: List[str], job_params: List[argparse.Namespace]
+    ):
+        job_hashes = (
+            (self._job_hash(job_param), job_id) for job_id, job_param in zip(job_ids, job_params)
+        )
+        self.result_cache.record_submissions(
+            (hash_, job_id) for hash_, job_id in job_hashes if hash_ is not None
+        )
+        params_store = JobParamsStore(self.db_file)
+        params_store.record(zip(job_ids, job_params))
+        params_store.close()
+
+    def _update_tracker(self, job_ids: List[str]):
+        exp_info = self.job_function_description
+        rows = [
+            make_tracker_row(
+                str(_job_start_time(self.jobs[job_id])).split(".")[0],
+                job_id,
+                self.job_descriptions[job_id],
+                exp_info,
+                exp_id=self.exp_id,
+            )
+            for job_id in job_ids
+        ]
+        tracker = TrackerStore(self.tracker_file, self.legacy_tracker_file)
+        tracker.append(rows)
+        tracker.close()
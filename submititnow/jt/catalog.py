@@ -0,0 +1,190 @@
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional
+
+from submititnow.jt import store
+
+
+class ExperimentSummary(NamedTuple):
+    exp_name: str
+    num_launches: int
+    num_jobs: Optional[int]
+    last_activity: Optional[str]
+
+
+class Launch(NamedTuple):
+    exp_id: str
+    exp_name: str
+    launched_at: Optional[str]
+    num_jobs: Optional[int]
+
+
+class PipelineStage(NamedTuple):
+    """A stage of a pipeline run: the launch of an experiment that depends on other stages."""
+
+    pipeline_name: str
+    pipeline_id: str
+    stage: str
+    exp_name: str
+    exp_id: Optional[str]
+    # Job arrays submitted by the stage, comma-separated, empty if every job was cached.
+    array_ids: str
+    num_tasks: int
+    # Stages this one depends on, comma-separated, and the type of the dependency.
+    after: str
+    dependency: str
+    launched_at: Optional[str]
+
+
+class Catalog:
+    """Global catalog under the submititnow root dir of every experiment and its launches.
+
+    Each launch is recorded with its experiment, submission time and job count, and
+    the job arrays it submitted besides the first one (its exp ID), e.g. when it spans
+    several arrays or resubmits failed jobs. Listing the experiments or finding the
+    owner of a job is then an indexed query instead of a walk over every experiment's
+    tracker.
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS launches (
+            exp_id TEXT PRIMARY KEY,
+            exp_name TEXT NOT NULL,
+            launched_at TEXT,
+            num_jobs INTEGER
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS launches_exp_name ON launches (exp_name, launched_at)",
+        """
+        CREATE TABLE IF NOT EXISTS launch_arrays (
+            array_id TEXT PRIMARY KEY,
+            exp_id TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS pipeline_stages (
+            pipeline_name TEXT NOT NULL,
+            pipeline_id TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            exp_name TEXT NOT NULL,
+            exp_id TEXT,
+            array_ids TEXT NOT NULL,
+            num_tasks INTEGER NOT NULL,
+            after TEXT NOT NULL,
+            dependency TEXT NOT NULL,
+            launched_at TEXT,
+            PRIMARY KEY (pipeline_name, pipeline_id, stage)
+        )
+        """,
+    )
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = store.connect(self.db_path, self.SCHEMA)
+        return self._conn
+
+    def record_launch(
+        self,
+        exp_id: str,
+        exp_name: str,
+        launched_at: Optional[str] = None,
+        num_jobs: Optional[int] = None,
+        array_ids: Iterable[str] = (),
+    ):
+        """Records `num_jobs` more jobs in the launch `exp_id` of the experiment `exp_name`,
+        submitted as the job arrays `array_ids`.
+        """
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO launch_arrays (array_id, exp_id) VALUES (?, ?)",
+                [
+                    (str(array_id), str(exp_id))
+                    for array_id in array_ids
+                    if str(array_id) != str(exp_id)
+                ],
+            )
+            self.conn.execute(
+                """
+                INSERT INTO launches (exp_id, exp_name, launched_at, num_jobs)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (exp_id) DO UPDATE SET
+                    exp_name = excluded.exp_name,
+                    launched_at = COALESCE(launches.launched_at, excluded.launched_at),
+                    num_jobs = CASE
+                        WHEN excluded.num_jobs IS NULL THEN launches.num_jobs
+                        ELSE COALESCE(launches.num_jobs, 0) + excluded.num_jobs
+                    END
+                """,
+                (str(exp_id), exp_name, launched_at, num_jobs),
+            )
+
+    def find_exp_name(self, exp_id: str) -> Optional[str]:
+        """Returns the experiment of the launch `exp_id`, or of the launch that submitted the array `exp_id`."""
+        row = self.conn.execute(
+            "SELECT exp_name FROM launches WHERE exp_id ="
+            " COALESCE((SELECT exp_id FROM launch_arrays WHERE array_id = ?), ?)",
+            (str(exp_id), str(exp_id)),
+        ).fetchone()
+        return row[0] if row else None
+
+    def list_experiments(self) -> List[ExperimentSummary]:
+        """Returns every experiment, the most recently active first."""
+        rows = self.conn.execute(
+            """
+            SELECT exp_name, COUNT(*), SUM(num_jobs), MAX(launched_at)
+            FROM launches
+            GROUP BY exp_name
+            ORDER BY MAX(launched_at) DESC
+            """
+        ).fetchall()
+        return [ExperimentSummary(*row) for row in rows]
+
+    def list_launches(self, exp_name: str) -> List[Launch]:
+        """Returns the launches of `exp_name`, the most recent first."""
+        rows = self.conn.execute(
+            "SELECT exp_id, exp_name, launched_at, num_jobs FROM launches"
+            " WHERE exp_name = ? ORDER BY launched_at DESC",
+            (exp_name,),
+        ).fetchall()
+        return [Launch(*row) for row in rows]
+
+    def record_stage(self, stage: PipelineStage):
+        with self.conn:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO pipeline_stages ({', '.join(PipelineStage._fields)})"
+                f" VALUES ({', '.join('?' * len(PipelineStage._fields))})",
+                stage,
+            )
+
+    def list_pipeline_runs(self, pipeline_name: str) -> List[str]:
+        """Returns the IDs of the runs of `pipeline_name`, the most recent first."""
+        rows = self.conn.execute(
+            "SELECT pipeline_id FROM pipeline_stages WHERE pipeline_name = ?"
+            " GROUP BY pipeline_id ORDER BY MIN(rowid) DESC",
+            (pipeline_name,),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def list_stages(self, pipeline_name: str, pipeline_id: Optional[str] = None) -> List[PipelineStage]:
+        """Returns the stages of a run of `pipeline_name` in launch order, of its latest run by default."""
+        if pipeline_id is None:
+            runs = self.list_pipeline_runs(pipeline_name)
+            if not runs:
+                return []
+            pipeline_id = runs[0]
+        rows = self.conn.execute(
+            f"SELECT {', '.join(PipelineStage._fields)} FROM pipeline_stages"
+            " WHERE pipeline_name = ? AND pipeline_id = ? ORDER BY rowid",
+            (pipeline_name, str(pipeline_id)),
+        ).fetchall()
+        return [PipelineStage(*row) for row in rows]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
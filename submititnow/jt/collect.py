@@ -0,0 +1,193 @@
+import csv
+import os
+import pickle
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from submititnow.jt.results import JobParamsStore, read_result_pickle, split_point, unpack_result
+from submititnow.jt.utils import JTExp
+
+
+def result_columns(value: Any) -> Dict[str, Any]:
+    """Returns the columns of a job result: one per key of a dict result, `result` otherwise."""
+    if isinstance(value, dict):
+        return {f"result.{key}": item for key, item in value.items()}
+    return {"result": value}
+
+
+def _load_task_results(
+    args: Tuple[str, List[Optional[str]]]
+) -> List[Optional[Tuple[bool, Any]]]:
+    # Loads the pickle of an array task once for all of its requested points.
+    result_path, points = args
+    try:
+        outcome_value = read_result_pickle(result_path)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return [None] * len(points)
+    return [unpack_result(outcome_value, point) for point in points]
+
+
+def _batches(items: List, batch_size: int) -> Iterator[List]:
+    for start in range(0, len(items), batch_size):
+        yield items[start : start + batch_size]
+
+
+def collect_experiment(
+    exp: JTExp,
+    exp_id: Optional[int] = None,
+    batch_size: int = 1000,
+    workers: Optional[int] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Yields the rows of the jobs of an experiment that completed successfully, one batch at a time.
+
+    Each row holds the job ID, the job's parameters and its result (see `result_columns`).
+    The result pickles of a batch are loaded in parallel threads, and only one batch is
+    held in memory at a time.
+    """
+    tracker = exp.tracker
+    job_ids = [row.job_id for row in tracker.load(exp_id)]
+    tracker.close()
+    params_store = JobParamsStore(exp.db_file)
+
+    job_index = exp.job_index
+    job_index.refresh()
+    workers = workers or min(os.cpu_count() or 1, 16)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch in _batches(job_ids, batch_size):
+            # Points packed in the same array task share its pickle.
+            tasks: Dict[str, List[str]] = {}
+            for job_id in batch:
+                result_path = job_index.lookup(job_id, refresh=False).get("result")
+                if result_path is not None:
+                    tasks.setdefault(result_path, []).append(job_id)
+            args = [
+                (result_path, [split_point(job_id)[1] for job_id in task_job_ids])
+                for result_path, task_job_ids in tasks.items()
+            ]
+            outcomes = {}
+            for task_job_ids, task_outcomes in zip(
+                tasks.values(), executor.map(_load_task_results, args)
+            ):
+                outcomes.update(zip(task_job_ids, task_outcomes))
+
+            job_params = params_store.load(job_id for job_id in batch if job_id in outcomes)
+            rows = []
+            for job_id in batch:
+                outcome = outcomes.get(job_id)
+                if outcome is None or not outcome[0]:
+                    continue
+                params = job_params.get(job_id, {})
+                rows.append({"job_id": job_id, **params, **result_columns(outcome[1])})
+            yield rows
+    job_index.close()
+    params_store.close()
+
+
+def _spill(batches: Iterable[List[Dict[str, Any]]], fp) -> Iterator[List[Dict[str, Any]]]:
+    """Writes the non-empty batches to the temporary file `fp` as they are yielded.
+
+    The columns of all the rows are only known once every batch was seen, see `_unspill`.
+    """
+    for rows in batches:
+        if rows:
+            pickle.dump(rows, fp, protocol=pickle.HIGHEST_PROTOCOL)
+            yield rows
+
+
+def _unspill(fp) -> Iterator[List[Dict[str, Any]]]:
+    """Yields back the batches written by `_spill`, one at a time."""
+    fp.seek(0)
+    while True:
+        try:
+            yield pickle.load(fp)
+        except EOFError:
+            return
+
+
+def _write_csv(batches: Iterable[List[Dict[str, Any]]], output: Path) -> int:
+    num_rows, columns = 0, {}
+    with tempfile.TemporaryFile() as spill:
+        for rows in _spill(batches, spill):
+            for row in rows:
+                columns.update(dict.fromkeys(row))
+            num_rows += len(rows)
+        if not num_rows:
+            return 0
+        with open(output, "w", newline="") as fp:
+            writer = csv.DictWriter(fp, fieldnames=list(columns))
+            writer.writeheader()
+            for rows in _unspill(spill):
+                writer.writerows(rows)
+    return num_rows
+
+
+def _column_type(values: List[Any]):
+    import pyarrow as pa
+
+    try:
+        return pa.array(values).type
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.string()
+
+
+def _promote_type(left, right):
+    """Returns the type of a column with values of both types: a float for mixed numbers, a string otherwise."""
+    import pyarrow as pa
+
+    if left == right or pa.types.is_null(right):
+        return left
+    if pa.types.is_null(left):
+        return right
+    numeric = (pa.types.is_integer, pa.types.is_floating)
+    if any(is_type(left) for is_type in numeric) and any(is_type(right) for is_type in numeric):
+        return pa.float64()
+    return pa.string()
+
+
+def _write_parquet(batches: Iterable[List[Dict[str, Any]]], output: Path) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    num_rows, types = 0, {}
+    with tempfile.TemporaryFile() as spill:
+        for rows in _spill(batches, spill):
+            columns = {}
+            for row in rows:
+                columns.update(dict.fromkeys(row))
+            for column in columns:
+                column_type = _column_type([row.get(column) for row in rows])
+                types[column] = _promote_type(types.get(column, pa.null()), column_type)
+            num_rows += len(rows)
+        if not num_rows:
+            return 0
+
+        schema = pa.schema(list(types.items()))
+        # Values of the columns with mixed types are written as strings.
+        string_columns = [
+            column for column, column_type in types.items() if column_type == pa.string()
+        ]
+        with pq.ParquetWriter(output, schema) as writer:
+            for rows in _unspill(spill):
+                for row in rows:
+                    for column in string_columns:
+                        if row.get(column) is not None and not isinstance(row[column], str):
+                            row[column] = str(row[column])
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+    return num_rows
+
+
+def write_batches(batches: Iterable[List[Dict[str, Any]]], output: Path) -> int:
+    """Writes batches of rows to a Parquet file (requires pyarrow), or to a CSV file if `output` ends with `.csv`.
+
+    The batches are spilled to a temporary file until the columns of all the rows are
+    known: rows lacking a column leave it empty, and a Parquet column whose values have
+    different types is written as floats (mixed numbers) or as strings.
+
+    Returns the number of rows written.
+    """
+    output = Path(output)
+    if output.suffix == ".csv":
+        return _write_csv(batches, output)
+    return _write_parquet(batches, output)
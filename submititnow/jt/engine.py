@@ -0,0 +1,253 @@
+import asyncio
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from submititnow.jt import utils
+from submititnow.jt.index import JobFileIndex
+from submititnow.jt.logs import LogTailCache, find_last_line, marker_predicate
+from submititnow.jt.results import load_result
+from submititnow.jt.scheduler import SlurmBackend, take_snapshot_async
+from submititnow.jt.states import JobStateStore, is_terminal_state
+from submititnow.jt.timings import parse_time, read_job_timing, timing_reads
+from submititnow.jt.tracker import TrackerStore
+
+MIN_POLL_INTERVAL = 1.0
+MAX_POLL_INTERVAL = 30.0
+
+# Statuses of the jobs that did not reach each `until` milestone yet.
+_NOT_STARTED = ("UNSUBMITTED", "PENDING", "UNKNOWN")
+
+
+def has_reached(status: str, until: str) -> bool:
+    """Whether a job with this status reached the `until` milestone: 'none', 'submitted', 'running' or 'done'."""
+    if until == "none":
+        return True
+    if until == "submitted":
+        return status != "UNSUBMITTED"
+    if until == "running":
+        return not status.startswith(_NOT_STARTED)
+    if until == "done":
+        return is_terminal_state(status)
+    raise ValueError(
+        f"until must be one of 'none', 'submitted', 'running', 'done', got {until}"
+    )
+
+
+def run_sync(coroutine):
+    """Runs a coroutine from synchronous code, even when an event loop is already running (e.g. in Jupyter)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+def iter_sync(async_iterator: AsyncIterator) -> Iterator:
+    """Iterates an async generator from synchronous code, on an event loop of its own thread."""
+    loop = asyncio.new_event_loop()
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    def step(awaitable):
+        return executor.submit(loop.run_until_complete, awaitable).result()
+
+    try:
+        while True:
+            try:
+                yield step(async_iterator.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        step(async_iterator.aclose())
+        # Also finalizes the async generators the iterator was itself iterating.
+        step(loop.shutdown_asyncgens())
+        executor.submit(loop.close).result()
+        executor.shutdown()
+
+
+def _read_last_line(filepath: str, marker: str, offset: int):
+    stat = os.stat(filepath)
+    return stat, find_last_line(filepath, marker_predicate(marker), offset)
+
+
+class StateEngine:
+    """Probes the states of the jobs of an experiment concurrently.
+
+    The scheduler queries, the reads of the changed logs and the result pickle checks
+    of a probe all run at the same time, with at most `max_concurrency` files read at
+    once and each read bounded by `io_timeout` seconds. States are then derived from
+    what was read by `load_job_states`, the same as `jt jobs`. Terminated jobs are
+    recorded and never probed again.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        logs_dir: Path,
+        max_concurrency: int = 16,
+        io_timeout: float = 10.0,
+        backend: Optional[SlurmBackend] = None,
+    ):
+        self.state_store = JobStateStore(db_path)
+        self.job_index = JobFileIndex(logs_dir, db_path)
+        self.log_cache = LogTailCache(db_path)
+        self.tracker = TrackerStore(db_path)
+        self.backend = backend or SlurmBackend()
+        self.io_timeout = io_timeout
+        self.snapshot = None
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    async def _in_thread(self, func, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._executor, func, *args), self.io_timeout
+            )
+        except (asyncio.TimeoutError, OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    async def _read_logs(self, reads: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Reads the last marker lines of the changed logs, returns the reads that failed."""
+        reads = [read for read in dict.fromkeys(reads) if self.log_cache.needs_read(*read)]
+        # Only the lines appended since the last read are searched, see `LogTailCache.scan_offset`.
+        offsets = [self.log_cache.scan_offset(filepath, marker) for filepath, marker in reads]
+        results = await asyncio.gather(
+            *(
+                self._in_thread(_read_last_line, filepath, marker, offset)
+                for (filepath, marker), offset in zip(reads, offsets)
+            )
+        )
+        failed = []
+        for (filepath, marker), offset, result in zip(reads, offsets, results):
+            if result is None:
+                failed.append((filepath, marker))
+            else:
+                self.log_cache.update(filepath, marker, *result, offset)
+        return failed
+
+    async def _check_result(self, job_id: str, result_path: str) -> Optional[str]:
+        _, _, point = job_id.partition(":")
+        outcome = await self._in_thread(load_result, result_path, point or None)
+        if outcome is None:
+            return None
+        return "COMPLETED" if outcome[0] else "FAILED: Triggered an Exception"
+
+    async def probe(self, job_ids: Iterable, query_scheduler: bool = True) -> Dict[str, str]:
+        """Returns the status of each job.
+
+        Args:
+            query_scheduler: Take a new scheduler snapshot of the active jobs, instead of
+                reusing the last one. The scheduler is only needed for the jobs that did
+                not start writing their logs.
+        """
+        job_ids = [str(job_id) for job_id in job_ids]
+        statuses = self.state_store.load_terminal_states(job_ids)
+        active_job_ids = [job_id for job_id in job_ids if job_id not in statuses]
+        if not active_job_ids:
+            return statuses
+
+        self.job_index.refresh()
+        filepaths = {
+            job_id: self.job_index.lookup(job_id, refresh=False) for job_id in active_job_ids
+        }
+        reads = [
+            read for job_id in active_job_ids for read in utils.log_reads(job_id, filepaths[job_id])
+        ]
+
+        fresh_snapshot = query_scheduler or self.snapshot is None
+        if fresh_snapshot:
+            snapshot, failed_reads = await asyncio.gather(
+                take_snapshot_async(active_job_ids, self.backend), self._read_logs(reads)
+            )
+            self.snapshot = snapshot
+        else:
+            failed_reads = await self._read_logs(reads)
+        failed_reads = set(failed_reads)
+
+        active_statuses = {}
+        for job_id in active_job_ids:
+            if failed_reads.intersection(utils.log_reads(job_id, filepaths[job_id])):
+                active_statuses[job_id] = "UNKNOWN (logs could not be read)"
+            else:
+                active_statuses[job_id] = utils.load_job_states(
+                    job_id, filepaths[job_id], self.snapshot, self.log_cache
+                )
+
+        # A result pickle is written right before the final log line: it settles the
+        # jobs whose logs lag behind.
+        unsettled = [
+            job_id
+            for job_id, status in active_statuses.items()
+            if not is_terminal_state(status) and "result" in filepaths[job_id]
+        ]
+        outcomes = await asyncio.gather(
+            *(self._check_result(job_id, filepaths[job_id]["result"]) for job_id in unsettled)
+        )
+        for job_id, outcome in zip(unsettled, outcomes):
+            if outcome is not None:
+                active_statuses[job_id] = outcome
+
+        finished = [
+            job_id for job_id, status in active_statuses.items() if is_terminal_state(status)
+        ]
+        await self._record_timings(finished, filepaths)
+        self.log_cache.flush()
+
+        # The states inferred from an older snapshot are not final.
+        self.state_store.record(active_statuses, self.snapshot if fresh_snapshot else None)
+        return {**statuses, **active_statuses}
+
+    async def _record_timings(self, job_ids: List[str], filepaths: Dict[str, Dict[str, str]]):
+        """Records in the tracker the timings logged by the finished jobs, see `submititnow.timing`."""
+        reads = {job_id: timing_reads(job_id, filepaths[job_id]) for job_id in job_ids}
+        failed_reads = set(
+            await self._read_logs([read for job_reads in reads.values() for read in job_reads])
+        )
+        timings = {}
+        for job_id in job_ids:
+            if failed_reads.intersection(reads[job_id]):
+                continue
+            scheduled_at = parse_time(self.snapshot.get_info(job_id).get("Start"))
+            timing = read_job_timing(job_id, filepaths[job_id], self.log_cache, scheduled_at)
+            if timing is not None:
+                timings[job_id] = timing
+        if timings:
+            self.tracker.record_timings(timings)
+
+    async def watch(
+        self,
+        job_ids: Iterable,
+        until: str = "done",
+        poll_interval: float = MIN_POLL_INTERVAL,
+        max_poll_interval: float = MAX_POLL_INTERVAL,
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """Yields `(job_id, status)` as each job reaches the `until` milestone (see `has_reached`).
+
+        The jobs are probed every `poll_interval` seconds, backing off up to
+        `max_poll_interval` while nothing changes.
+        """
+        has_reached("UNSUBMITTED", until)  # Validates `until` before any probe.
+        pending = [str(job_id) for job_id in job_ids]
+        interval = poll_interval
+        while pending:
+            statuses = await self.probe(pending)
+            still_pending = []
+            for job_id in pending:
+                if has_reached(statuses[job_id], until):
+                    yield job_id, statuses[job_id]
+                else:
+                    still_pending.append(job_id)
+            if not still_pending:
+                break
+            changed = len(still_pending) < len(pending)
+            interval = poll_interval if changed else min(interval * 2, max_poll_interval)
+            pending = still_pending
+            await asyncio.sleep(interval)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        for closeable in (self.job_index, self.log_cache, self.state_store, self.tracker):
+            closeable.close()
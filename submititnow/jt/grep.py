@@ -0,0 +1,65 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Union
+
+from submititnow.jt import logs
+from submititnow.jt.utils import JTExp
+
+
+class JobGrepResult(NamedTuple):
+    job_id: str
+    stream: str
+    filepath: str
+    matches: List[logs.GrepMatch]
+
+
+def _grep_file(args):
+    filepath, regex, max_matches, context = args
+    try:
+        return logs.grep_file(filepath, regex, max_matches, context)
+    except OSError:
+        return []
+
+
+def grep_experiment(
+    exp: JTExp,
+    pattern: Union[str, "re.Pattern[bytes]"],
+    exp_id: Optional[int] = None,
+    streams: Sequence[str] = ("out", "err"),
+    max_matches: int = 10,
+    context: int = 0,
+    ignore_case: bool = False,
+    workers: Optional[int] = None,
+) -> Iterator[JobGrepResult]:
+    """Searches the logs of all the jobs of an experiment in parallel, one process per file.
+
+    Yields the files with at least one match, in the order of the experiment tracker.
+    `pattern` is compiled (see `logs.compile_pattern`) before any process starts, an
+    invalid one raises `re.error`.
+    """
+    regex = pattern
+    if not isinstance(regex, re.Pattern):
+        regex = logs.compile_pattern(pattern, ignore_case)
+    tracker = exp.tracker
+    # Points packed in the same array task share its logs.
+    job_ids = list(dict.fromkeys(row.job_id.split(":")[0] for row in tracker.load(exp_id)))
+    tracker.close()
+    job_index = exp.job_index
+    job_index.refresh()
+    targets = []
+    for job_id in job_ids:
+        filepaths = job_index.lookup(job_id, refresh=False)
+        for stream in streams:
+            if stream in filepaths:
+                targets.append((job_id, stream, filepaths[stream]))
+    job_index.close()
+
+    tasks = [(filepath, regex, max_matches, context) for _, _, filepath in targets]
+    workers = workers or min(len(tasks), os.cpu_count() or 1, 16) or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for (job_id, stream, filepath), matches in zip(
+            targets, executor.map(_grep_file, tasks, chunksize=4)
+        ):
+            if matches:
+                yield JobGrepResult(job_id, stream, filepath, matches)
@@ -0,0 +1,143 @@
+import os
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable
+
+from submititnow.jt import store
+
+if TYPE_CHECKING:
+    import submitit
+
+# Submitit names every file in a (flat) logs folder after the job it belongs to:
+#   <array_id>_submission.sh, <job_task>_<rank>_log.{out,err}, <job_task>_<rank>_result.pkl
+# where <job_task> is either `<array_id>_<task_id>` or a plain `<job_id>`.
+_JOB_FILE_PATTERNS = {
+    "sh": re.compile(r"^(?P<job_task>\d+)_submission\.sh$"),
+    "out": re.compile(r"^(?P<job_task>\d+(?:_\d+)?)_(?P<rank>\d+)_log\.out$"),
+    "err": re.compile(r"^(?P<job_task>\d+(?:_\d+)?)_(?P<rank>\d+)_log\.err$"),
+    "result": re.compile(r"^(?P<job_task>\d+(?:_\d+)?)_(?P<rank>\d+)_result\.pkl$"),
+}
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS job_files (
+        job_task TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        path TEXT NOT NULL,
+        PRIMARY KEY (job_task, kind)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS index_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """,
+)
+
+
+def parse_job_filename(filename: str):
+    """Returns the `(job_task, kind)` a submitit log file belongs to, or None.
+
+    Only the files of the first node (rank 0) are indexed, that is where submitit
+    reports the job progress.
+    """
+    for kind, pattern in _JOB_FILE_PATTERNS.items():
+        match = pattern.match(filename)
+        if match and match.groupdict().get("rank", "0") == "0":
+            return match["job_task"], kind
+    return None
+
+
+class JobFileIndex:
+    """On-disk index of the submitit files of one experiment.
+
+    Maps a job ID (`<array_id>_<task_id>` or `<job_id>`) to the paths of its
+    `sh`, `out`, `err` and `result` files. The index is refreshed by listing the
+    experiment's (flat) logs folder only when its mtime changed since the last scan.
+    """
+
+    def __init__(self, logs_dir: Path, db_path: Path):
+        self.logs_dir = Path(logs_dir)
+        self.db_path = Path(db_path)
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = store.connect(self.db_path, _SCHEMA)
+        return self._conn
+
+    def _insert(self, rows: Iterable[tuple]):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO job_files (job_task, kind, path) VALUES (?, ?, ?)",
+                rows,
+            )
+
+    def record_jobs(self, jobs: Iterable["submitit.Job"]):
+        """Records the submission scripts of freshly submitted jobs."""
+        rows = set()
+        for job in jobs:
+            array_id = str(job.job_id).split("_")[0]
+            rows.add((array_id, "sh", str(job.paths.submission_file)))
+        self._insert(rows)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Indexes files added to the logs folder since the last scan.
+
+        Returns True if the logs folder was scanned.
+        """
+        try:
+            dir_mtime = str(os.stat(self.logs_dir).st_mtime_ns)
+        except FileNotFoundError:
+            return False
+
+        last_mtime = self.conn.execute(
+            "SELECT value FROM index_meta WHERE key = 'logs_dir_mtime'"
+        ).fetchone()
+        if not force and last_mtime and last_mtime[0] == dir_mtime:
+            return False
+
+        rows = []
+        with os.scandir(self.logs_dir) as entries:
+            for entry in entries:
+                parsed = parse_job_filename(entry.name)
+                if parsed:
+                    rows.append((*parsed, entry.path))
+        self._insert(rows)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO index_meta (key, value) VALUES ('logs_dir_mtime', ?)",
+                (dir_mtime,),
+            )
+        return True
+
+    def _lookup(self, job_task: str) -> Dict[str, str]:
+        array_id = job_task.split("_")[0]
+        rows = self.conn.execute(
+            "SELECT job_task, kind, path FROM job_files WHERE job_task IN (?, ?)",
+            (job_task, array_id),
+        ).fetchall()
+        files = {}
+        for row_job_task, kind, path in rows:
+            # The submission script is shared by all the tasks of an array.
+            if row_job_task == job_task or kind == "sh":
+                files[kind] = path
+        return files
+
+    def lookup(self, job_task: str, refresh: bool = True) -> Dict[str, str]:
+        """Returns the known files of the job `job_task`, keyed by `sh`, `out`, `err` and `result`.
+
+        Points packed in an array task (`<job_task>:<k>`) share the files of the task.
+        """
+        job_task = str(job_task).split(":")[0]
+        files = self._lookup(job_task)
+        if refresh and len(files) < len(_JOB_FILE_PATTERNS) and self.refresh():
+            files = self._lookup(job_task)
+        return files
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,456 @@
+import codecs
+import mmap
+import os
+import re
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+from submititnow.jt import store
+
+_CHUNK_SIZE = 1 << 16
+# Files larger than this are mapped in memory instead of being read chunk by chunk.
+_MMAP_THRESHOLD = 1 << 20
+
+# Progress bars (tqdm) rewrite their line with carriage returns, treat them as line breaks.
+_LINE_BREAK = re.compile(rb"[\r\n]")
+_LINE_CONTROL = re.compile(r"(\r|\n)")
+
+
+def point_log_prefix(point) -> str:
+    """Prefix of the status lines logged for each job params packed in an array task."""
+    return f"submititnow point {point} - "
+
+
+def timing_log_prefix(point=None) -> str:
+    """Prefix of the timing lines logged for each job, or for each packed point."""
+    if point is None:
+        return "submititnow timing - "
+    return f"submititnow timing point {point} - "
+
+
+def requeue_log_prefix() -> str:
+    """Prefix of the line logged by a checkpointed job restarting after a requeue."""
+    return "submititnow requeue - "
+
+
+# Marker lines that `load_job_states` is looking for, by name.
+MARKERS: Dict[str, Callable[[str], bool]] = {
+    "submitit": lambda line: line.startswith("submitit "),
+    # A requeued job restarting also logs its requeue line there, see `CheckpointableJob`.
+    "slurm": lambda line: line.startswith(("srun: ", requeue_log_prefix()))
+    or "slurmstepd: " in line,
+    "timing": lambda line: line.startswith(timing_log_prefix()),
+    "requeue": lambda line: line.startswith(requeue_log_prefix()),
+}
+
+
+def marker_predicate(marker: str) -> Callable[[str], bool]:
+    """Returns the predicate of a named marker.
+
+    `point:<k>` matches the status lines of packed point k, `timing:<k>` its timing lines.
+    """
+    name, _, point = marker.partition(":")
+    if name == "point":
+        prefix = point_log_prefix(point)
+        return lambda line: line.startswith(prefix)
+    if name == "timing" and point:
+        prefix = timing_log_prefix(point)
+        return lambda line: line.startswith(prefix)
+    return MARKERS[marker]
+
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS log_tails (
+        path TEXT NOT NULL,
+        marker TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        line TEXT,
+        PRIMARY KEY (path, marker)
+    )
+    """,
+)
+
+
+def _reversed_chunks(fp, size: int, chunk_size: int, offset: int = 0) -> Iterator[bytes]:
+    if size >= _MMAP_THRESHOLD:
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            for end in range(size, offset, -chunk_size):
+                yield buffer[max(offset, end - chunk_size) : end]
+    else:
+        for end in range(size, offset, -chunk_size):
+            start = max(offset, end - chunk_size)
+            fp.seek(start)
+            yield fp.read(end - start)
+
+
+def _line_start(fp, offset: int, chunk_size: int = _CHUNK_SIZE) -> int:
+    """Returns the offset of the start of the line that contains `offset`."""
+    for end in range(offset, 0, -chunk_size):
+        start = max(0, end - chunk_size)
+        chunk = _read_at(fp, start, end - start)
+        position = max(chunk.rfind(b"\n"), chunk.rfind(b"\r"))
+        if position >= 0:
+            return start + position + 1
+    return 0
+
+
+def iter_lines_reversed(fp, chunk_size: int = _CHUNK_SIZE, offset: int = 0) -> Iterator[str]:
+    """Yields the lines of a binary file object from the last one to the first one.
+
+    With `offset`, stops after the line that contains it.
+    """
+    size = os.fstat(fp.fileno()).st_size
+    offset = _line_start(fp, min(offset, size), chunk_size) if offset else 0
+    remainder = b""
+    for chunk in _reversed_chunks(fp, size, chunk_size, offset):
+        pieces = _LINE_BREAK.split(chunk + remainder)
+        # The first piece may be the tail of a line that starts in the previous chunk.
+        remainder = pieces[0]
+        for piece in reversed(pieces[1:]):
+            yield piece.decode("utf-8", errors="replace")
+    if remainder:
+        yield remainder.decode("utf-8", errors="replace")
+
+
+def find_last_line(
+    filepath: str, predicate: Callable[[str], bool], offset: int = 0
+) -> Optional[str]:
+    """Returns the last line of `filepath` that satisfies `predicate`, reading the file backwards.
+
+    With `offset`, only the lines after it (and the one that contains it) are searched.
+    """
+    with open(filepath, "rb") as fp:
+        for line in iter_lines_reversed(fp, offset=offset):
+            if predicate(line):
+                return line
+    return None
+
+
+def find_tail_offset(fp, num_lines: int, chunk_size: int = _CHUNK_SIZE) -> int:
+    """Returns the offset of the first of the last `num_lines` lines of a binary file object."""
+    size = os.fstat(fp.fileno()).st_size
+    if num_lines <= 0:
+        return size
+
+    # A trailing newline terminates the last line, it does not start a new one.
+    newlines_needed = num_lines + 1 if size and _read_at(fp, size - 1, 1) == b"\n" else num_lines
+    for end in range(size, 0, -chunk_size):
+        start = max(0, end - chunk_size)
+        chunk = _read_at(fp, start, end - start)
+        newlines = chunk.count(b"\n")
+        if newlines >= newlines_needed:
+            position = len(chunk)
+            for _ in range(newlines_needed):
+                position = chunk.rindex(b"\n", 0, position)
+            return start + position + 1
+        newlines_needed -= newlines
+    return 0
+
+
+def _read_at(fp, offset: int, size: int) -> bytes:
+    fp.seek(offset)
+    return fp.read(size)
+
+
+class LineAssembler:
+    """Assembles streamed text into lines, applying carriage returns the way a terminal would.
+
+    Text after a `\\r` overwrites the start of the current line, so progress bars only
+    keep their last state and memory stays bounded by the longest rendered line.
+    """
+
+    def __init__(self):
+        self._line = ""
+        self._cursor = 0
+        # The current line as last returned by `peek`, it is not repeated once completed.
+        self._peeked = None
+
+    def feed(self, text: str) -> List[str]:
+        """Returns the lines completed by `text`."""
+        lines = []
+        for piece in _LINE_CONTROL.split(text):
+            if piece == "\n":
+                if self._line != self._peeked:
+                    lines.append(self._line)
+                self._line, self._cursor, self._peeked = "", 0, None
+            elif piece == "\r":
+                self._cursor = 0
+            elif piece:
+                end = self._cursor + len(piece)
+                self._line = self._line[: self._cursor] + piece + self._line[end:]
+                self._cursor = end
+        return lines
+
+    def peek(self) -> List[str]:
+        """Returns the current, unterminated, line if it changed since it was last peeked."""
+        if not self._line or self._line == self._peeked:
+            return []
+        self._peeked = self._line
+        return [self._line]
+
+    def flush(self) -> List[str]:
+        """Returns the current, unterminated, line if any."""
+        lines = self.peek()
+        self._line, self._cursor, self._peeked = "", 0, None
+        return lines
+
+
+def stream_lines(
+    filepath: str,
+    head: Optional[int] = None,
+    tail: Optional[int] = None,
+    follow: bool = False,
+    poll_interval: float = 0.5,
+    chunk_size: int = _CHUNK_SIZE,
+) -> Iterator[str]:
+    """Yields the lines of a log file without loading it in memory.
+
+    Args:
+        head: Only yield the first `head` lines.
+        tail: Start from the last `tail` lines.
+        follow: Keep yielding lines appended to the file until interrupted. An unterminated
+            line is yielded as it is whenever the file stops growing.
+    """
+    assembler = LineAssembler()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    num_lines = 0
+    with open(filepath, "rb") as fp:
+        if tail is not None:
+            fp.seek(find_tail_offset(fp, tail))
+        while True:
+            chunk = fp.read(chunk_size)
+            if chunk:
+                lines = assembler.feed(decoder.decode(chunk))
+            elif follow:
+                if os.fstat(fp.fileno()).st_size < fp.tell():
+                    # The log was truncated, start over.
+                    fp.seek(0)
+                # Nothing new was written: show the state of an unterminated line, e.g. a
+                # progress bar, which is completed much later.
+                lines = assembler.peek()
+            else:
+                lines = assembler.feed(decoder.decode(b"", final=True)) + assembler.flush()
+
+            for line in lines:
+                if head is not None and num_lines >= head:
+                    return
+                num_lines += 1
+                yield line
+            if not chunk:
+                if not follow:
+                    return
+                time.sleep(poll_interval)
+
+
+class GrepMatch(NamedTuple):
+    line_number: int
+    line: str
+    before: List[str]
+    after: List[str]
+
+
+def _render_line(line: bytes) -> str:
+    assembler = LineAssembler()
+    assembler.feed(line.decode("utf-8", errors="replace"))
+    return "".join(assembler.flush())
+
+
+def _count_newlines(buffer, start: int, end: int, chunk_size: int = _MMAP_THRESHOLD) -> int:
+    return sum(
+        buffer[offset : min(end, offset + chunk_size)].count(b"\n")
+        for offset in range(start, end, chunk_size)
+    )
+
+
+def _line_bounds(buffer, position: int) -> Tuple[int, int]:
+    start = buffer.rfind(b"\n", 0, position) + 1
+    end = buffer.find(b"\n", position)
+    return start, len(buffer) if end == -1 else end
+
+
+def compile_pattern(pattern: str, ignore_case: bool = False) -> "re.Pattern[bytes]":
+    """Compiles the regex `pattern` the way `grep_file` searches logs. Raises `re.error` if it is invalid."""
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    return re.compile(pattern.encode(), flags)
+
+
+def grep_file(
+    filepath: str,
+    pattern: Union[str, "re.Pattern[bytes]"],
+    max_matches: int = 10,
+    context: int = 0,
+    ignore_case: bool = False,
+) -> List[GrepMatch]:
+    """Returns the first `max_matches` lines of `filepath` matching the regex `pattern`.
+
+    The file is memory-mapped and searched as a whole, so only the matched lines
+    and their `context` surrounding lines are decoded. A progress bar line is cut
+    down to the carriage-return segment that matched. `pattern` may be compiled
+    beforehand with `compile_pattern`, `ignore_case` is then ignored.
+    """
+    regex = pattern if isinstance(pattern, re.Pattern) else compile_pattern(pattern, ignore_case)
+    matches = []
+    with open(filepath, "rb") as fp:
+        size = os.fstat(fp.fileno()).st_size
+        if size == 0 or max_matches <= 0:
+            return matches
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            line_number, counted_until, last_line_end = 1, 0, -1
+            for match in regex.finditer(buffer):
+                line_start, line_end = _line_bounds(buffer, match.start())
+                if line_start <= last_line_end:
+                    # Report every matching line once.
+                    continue
+                last_line_end = line_end
+                line_number += _count_newlines(buffer, counted_until, line_start)
+                counted_until = line_start
+
+                segment_start = max(line_start, buffer.rfind(b"\r", line_start, match.start()) + 1)
+                segment_end = buffer.find(b"\r", match.end(), line_end)
+                segment_end = line_end if segment_end == -1 else segment_end
+                line = buffer[segment_start:segment_end].decode("utf-8", errors="replace")
+
+                before, position = [], line_start
+                while len(before) < context and position > 0:
+                    start, end = _line_bounds(buffer, position - 1)
+                    before.insert(0, _render_line(buffer[start:end]))
+                    position = start
+                after, position = [], line_end
+                while len(after) < context and position + 1 < size:
+                    start, end = _line_bounds(buffer, position + 1)
+                    after.append(_render_line(buffer[start:end]))
+                    position = end
+
+                matches.append(GrepMatch(line_number, line, before, after))
+                if len(matches) >= max_matches:
+                    break
+    return matches
+
+
+class LogTailCache:
+    """Remembers the last marker line of each log file, keyed by the file's (size, mtime).
+
+    An unchanged log is never read again, and only the lines appended to a log that grew
+    are searched. The entries are persisted in `db_path` if provided, in one transaction
+    per `flush` (or `close`), and only kept in memory otherwise.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = db_path
+        self._conn = None
+        self._entries: Dict[Tuple[str, str], Tuple[int, int, Optional[str]]] = {}
+        # Keys of the entries updated since the last `flush`.
+        self._dirty: Set[Tuple[str, str]] = set()
+
+    @property
+    def conn(self):
+        if self._conn is None and self.db_path is not None:
+            self._conn = store.connect(self.db_path, _SCHEMA)
+        return self._conn
+
+    def _get(self, key: Tuple[str, str]):
+        if key not in self._entries and self.conn is not None:
+            row = self.conn.execute(
+                "SELECT size, mtime_ns, line FROM log_tails WHERE path = ? AND marker = ?",
+                key,
+            ).fetchone()
+            if row:
+                self._entries[key] = tuple(row)
+        return self._entries.get(key)
+
+    def _put(self, key: Tuple[str, str], entry: Tuple[int, int, Optional[str]]):
+        self._entries[key] = entry
+        if self.db_path is not None:
+            self._dirty.add(key)
+
+    def flush(self):
+        """Persists the entries updated since the last flush."""
+        if not self._dirty:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO log_tails (path, marker, size, mtime_ns, line)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [(*key, *self._entries[key]) for key in self._dirty],
+            )
+        self._dirty.clear()
+
+    def _cached(self, filepath: str, marker: str, stat: os.stat_result):
+        cached = self._get((str(filepath), marker))
+        if cached and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return cached
+        return None
+
+    def needs_read(self, filepath: Optional[str], marker: str) -> bool:
+        """Whether `last_line` would have to read `filepath`, i.e. it changed since it was last read."""
+        if filepath is None:
+            return False
+        try:
+            stat = os.stat(filepath)
+        except FileNotFoundError:
+            return False
+        return self._cached(filepath, marker, stat) is None
+
+    def scan_offset(
+        self, filepath: str, marker: str, stat: Optional[os.stat_result] = None
+    ) -> int:
+        """Returns the offset after which a changed `filepath` must be searched for `marker`.
+
+        Logs are only appended to: a log that grew since it was last read is searched from
+        its previous size, any other change is searched from the start.
+        """
+        if stat is None:
+            try:
+                stat = os.stat(filepath)
+            except FileNotFoundError:
+                return 0
+        cached = self._get((str(filepath), marker))
+        if cached and cached[0] < stat.st_size:
+            return cached[0]
+        return 0
+
+    def update(
+        self,
+        filepath: str,
+        marker: str,
+        stat: os.stat_result,
+        line: Optional[str],
+        offset: int = 0,
+    ) -> Optional[str]:
+        """Records the last `marker` line of `filepath`, read when it had the given `stat`.
+
+        If the file was searched from `offset` (see `scan_offset`) without a match, the line
+        found before it is kept. Returns the recorded line.
+        """
+        key = (str(filepath), marker)
+        if line is None and offset:
+            cached = self._get(key)
+            line = cached[2] if cached else None
+        self._put(key, (stat.st_size, stat.st_mtime_ns, line))
+        return line
+
+    def last_line(self, filepath: Optional[str], marker: str) -> Optional[str]:
+        """Returns the last line of `filepath` matching the named `marker` (see `marker_predicate`)."""
+        if filepath is None:
+            return None
+        try:
+            stat = os.stat(filepath)
+        except FileNotFoundError:
+            return None
+
+        cached = self._cached(filepath, marker, stat)
+        if cached:
+            return cached[2]
+
+        offset = self.scan_offset(filepath, marker, stat)
+        line = find_last_line(filepath, marker_predicate(marker), offset)
+        return self.update(filepath, marker, stat, line, offset)
+
+    def close(self):
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,245 @@
+import argparse
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from submititnow.jt import store
+from submititnow.jt.index import JobFileIndex
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS result_cache (
+        job_hash TEXT PRIMARY KEY,
+        job_id TEXT NOT NULL,
+        result_path TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS job_params (
+        job_id TEXT PRIMARY KEY,
+        params TEXT NOT NULL
+    )
+    """,
+)
+
+
+def _stable_json(value: Any) -> Any:
+    """JSON encoding of the values `json` does not support, stable across processes."""
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    if inspect.isroutine(value) or inspect.isclass(value):
+        # Lambdas and local definitions share their qualified name.
+        if "<" not in value.__qualname__:
+            return f"{value.__module__}.{value.__qualname__}"
+    else:
+        text = repr(value)
+        # Default reprs include the object's memory address.
+        if " at 0x" not in text:
+            return text
+    raise TypeError(f"{value!r} has no stable encoding")
+
+
+def job_hash(
+    job_func: Callable, job_param: argparse.Namespace, code_version: Optional[str] = None
+) -> Optional[str]:
+    """Returns a stable hash of a job: its function's qualified name, its parameters and the code version.
+
+    Returns None if a parameter has no stable encoding, i.e. the job cannot be cached.
+    """
+    func_name = job_func.__module__ + "." + job_func.__qualname__
+    try:
+        payload = json.dumps(
+            [func_name, vars(job_param), code_version], sort_keys=True, default=_stable_json
+        )
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def source_version(job_func: Callable) -> Optional[str]:
+    """Returns a hash of the source file of a job function, None if it cannot be found.
+
+    It is the default code version of a job: editing the script runs its jobs again.
+    """
+    source_file = getattr(job_func, "source_file", None)
+    try:
+        source_file = source_file() if callable(source_file) else inspect.getsourcefile(job_func)
+        if source_file is None:
+            return None
+        return hashlib.sha256(Path(source_file).read_bytes()).hexdigest()[:16]
+    except (TypeError, OSError):
+        return None
+
+
+def read_result_pickle(result_path: str) -> Tuple[str, Any]:
+    """Returns the `(outcome, value)` of a submitit result pickle."""
+    with open(result_path, "rb") as fp:
+        return pickle.load(fp)
+
+
+# The points of a packed task share a pickle: keep the last one around.
+_load_result_pickle = functools.lru_cache(maxsize=1)(read_result_pickle)
+
+
+def unpack_result(outcome_value: Tuple[str, Any], point: Optional[str] = None) -> Tuple[bool, Any]:
+    """Returns whether the job (or packed `point`) of a result pickle's content completed, and its result."""
+    outcome, value = outcome_value
+    if outcome != "success":
+        return False, value
+    if point is not None:
+        return tuple(value[int(point)])
+    return True, value
+
+
+def load_result(result_path: str, point: Optional[str] = None) -> Tuple[bool, Any]:
+    """Returns whether the job (or packed `point`) of a submitit result pickle completed, and its result."""
+    return unpack_result(_load_result_pickle(result_path), point)
+
+
+def split_point(job_id: str) -> Tuple[str, Optional[str]]:
+    job_task, _, point = job_id.partition(":")
+    return job_task, point or None
+
+
+class CachedJob:
+    """Stands in for the `submitit.Job` of a job whose identical run already completed."""
+
+    state = "COMPLETED"
+
+    def __init__(self, job_id: str, result_path: str):
+        self.job_id = job_id
+        self.result_path = result_path
+
+    def done(self) -> bool:
+        return True
+
+    def result(self) -> Any:
+        return load_result(self.result_path, split_point(self.job_id)[1])[1]
+
+    def __repr__(self):
+        return f"CachedJob<job_id={self.job_id}>"
+
+
+class ResultCache:
+    """Per-experiment cache of the jobs submitted for each job hash (see `job_hash`).
+
+    A job hash maps to the last job submitted for it. Its result pickle is recorded
+    once the job is found to have completed successfully, so that identical jobs are
+    not launched again.
+    """
+
+    def __init__(self, db_path: Path, job_index: JobFileIndex):
+        self.db_path = Path(db_path)
+        self.job_index = job_index
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = store.connect(self.db_path, _SCHEMA)
+        return self._conn
+
+    def record_submissions(self, job_hashes: Iterable[Tuple[str, str]]):
+        """Records the `(job_hash, job_id)` of freshly submitted jobs."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO result_cache (job_hash, job_id, result_path)"
+                " VALUES (?, ?, NULL)",
+                job_hashes,
+            )
+
+    def lookup(self, job_hash: str) -> Optional[CachedJob]:
+        """Returns the completed job of `job_hash`, or None if it never completed."""
+        row = self.conn.execute(
+            "SELECT job_id, result_path FROM result_cache WHERE job_hash = ?", (job_hash,)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._completed_job(job_hash, *row)
+
+    def completed_jobs(self) -> Dict[str, CachedJob]:
+        """Returns the completed job of every job hash that has one.
+
+        The logs folder is scanned at most once, instead of once per job hash with `lookup`.
+        """
+        self.job_index.refresh()
+        rows = self.conn.execute(
+            "SELECT job_hash, job_id, result_path FROM result_cache"
+        ).fetchall()
+        completed = {}
+        for job_hash, job_id, result_path in rows:
+            cached_job = self._completed_job(job_hash, job_id, result_path, refresh=False)
+            if cached_job is not None:
+                completed[job_hash] = cached_job
+        return completed
+
+    def _completed_job(
+        self, job_hash: str, job_id: str, result_path: Optional[str], refresh: bool = True
+    ) -> Optional[CachedJob]:
+        if result_path is not None:
+            return CachedJob(job_id, result_path) if os.path.exists(result_path) else None
+
+        job_task, point = split_point(job_id)
+        result_path = self.job_index.lookup(job_task, refresh=refresh).get("result")
+        if result_path is None:
+            return None
+        try:
+            completed, _ = load_result(result_path, point)
+        except (OSError, pickle.UnpicklingError, EOFError, IndexError, ValueError):
+            return None
+        if not completed:
+            return None
+
+        with self.conn:
+            self.conn.execute(
+                "UPDATE result_cache SET result_path = ? WHERE job_hash = ?",
+                (result_path, job_hash),
+            )
+        return CachedJob(job_id, result_path)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class JobParamsStore:
+    """Per-experiment store of the parameters of each launched job, as JSON."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = store.connect(self.db_path, _SCHEMA)
+        return self._conn
+
+    def record(self, job_params: Iterable[Tuple[str, argparse.Namespace]]):
+        """Records the `(job_id, params)` of freshly submitted jobs."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO job_params (job_id, params) VALUES (?, ?)",
+                (
+                    (job_id, json.dumps(vars(job_param), default=repr))
+                    for job_id, job_param in job_params
+                ),
+            )
+
+    def load(self, job_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Returns the recorded parameters of the `job_ids`, values that are not JSON are their repr."""
+        rows = store.select_in(
+            self.conn, "SELECT job_id, params FROM job_params WHERE job_id IN", map(str, job_ids)
+        )
+        return {job_id: json.loads(params) for job_id, params in rows}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
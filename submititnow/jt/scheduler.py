@@ -0,0 +1,234 @@
+import getpass
+import os
+import subprocess
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+# Fields requested from the scheduler, in the order they are printed.
+SQUEUE_FIELDS = {"JobID": "%i", "State": "%T", "NodeList": "%N", "Reason": "%r"}
+SACCT_FIELDS = ["JobID", "State", "NodeList", "ExitCode", "Start", "End"]
+# Resource usage fields, reported on the steps (e.g. `<job_task>.batch`) of each allocation.
+USAGE_FIELDS = ["JobID", "State", "Elapsed", "MaxRSS"]
+# Job arrays queried per `sacct` call, to keep its `--jobs` list and runtime bounded.
+SACCT_CHUNK_SIZE = 200
+
+
+def _task_id(job_id) -> str:
+    # Points packed in an array task (`<job_task>:<k>`) share the state of the task.
+    return str(job_id).split(":")[0]
+
+
+def _array_id(job_id) -> str:
+    return _task_id(job_id).split("_")[0]
+
+
+def _chunks(values: Sequence[str], chunk_size: int = SACCT_CHUNK_SIZE) -> List[Sequence[str]]:
+    return [values[i : i + chunk_size] for i in range(0, len(values), chunk_size)]
+
+
+def _parse_rows(output: str, fields: Sequence[str]) -> List[Dict[str, str]]:
+    rows = []
+    for line in output.splitlines():
+        values = line.strip().split("|")
+        if len(values) < len(fields):
+            continue
+        row = dict(zip(fields, values))
+        # sacct reports e.g. "CANCELLED by 1234", we only care about the state itself.
+        row["State"] = row["State"].split(" ")[0]
+        rows.append(row)
+    return rows
+
+
+class SlurmBackend:
+    """Queries SLURM through `squeue` and `sacct` with parseable output.
+
+    The commands can be overridden (or set through the `SUBMITITNOW_SQUEUE`,
+    `SUBMITITNOW_SACCT` and `SUBMITITNOW_SCONTROL` environment variables) to point
+    at fake scripts in tests.
+    """
+
+    def __init__(
+        self,
+        squeue_cmd: Optional[str] = None,
+        sacct_cmd: Optional[str] = None,
+        user: Optional[str] = None,
+        timeout: float = 30,
+        scontrol_cmd: Optional[str] = None,
+    ):
+        self.squeue_cmd = squeue_cmd or os.environ.get("SUBMITITNOW_SQUEUE", "squeue")
+        self.sacct_cmd = sacct_cmd or os.environ.get("SUBMITITNOW_SACCT", "sacct")
+        self.scontrol_cmd = scontrol_cmd or os.environ.get(
+            "SUBMITITNOW_SCONTROL", "scontrol"
+        )
+        self.user = user or os.environ.get("USER") or getpass.getuser()
+        self.timeout = timeout
+
+    def _run(self, cmd: List[str]) -> Optional[str]:
+        try:
+            process = subprocess.run(
+                cmd, capture_output=True, text=True, timeout=self.timeout
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        return process.stdout if process.returncode == 0 else None
+
+    async def _run_async(self, cmd: List[str]) -> Optional[str]:
+        import asyncio
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+            )
+        except OSError:
+            return None
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), self.timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return None
+        return stdout.decode() if process.returncode == 0 else None
+
+    def _squeue_cmd(self) -> List[str]:
+        return [
+            self.squeue_cmd,
+            "--noheader",
+            "--array",
+            f"--user={self.user}",
+            "--format=" + "|".join(SQUEUE_FIELDS.values()),
+        ]
+
+    def _sacct_cmd(
+        self, array_ids: Sequence[str], fields: Sequence[str] = SACCT_FIELDS, steps: bool = False
+    ) -> List[str]:
+        return [
+            self.sacct_cmd,
+            "--noheader",
+            "--parsable2",
+            *([] if steps else ["--allocations"]),
+            f"--jobs={','.join(array_ids)}",
+            f"--format={','.join(fields)}",
+        ]
+
+    def squeue(self) -> Optional[List[Dict[str, str]]]:
+        """Returns one row per queued job (array tasks expanded) of the user.
+
+        Returns None if the queue could not be queried.
+        """
+        output = self._run(self._squeue_cmd())
+        return None if output is None else _parse_rows(output, list(SQUEUE_FIELDS))
+
+    async def squeue_async(self) -> Optional[List[Dict[str, str]]]:
+        output = await self._run_async(self._squeue_cmd())
+        return None if output is None else _parse_rows(output, list(SQUEUE_FIELDS))
+
+    def sacct(self, array_ids: Sequence[str]) -> Optional[List[Dict[str, str]]]:
+        """Returns the accounting rows of the allocations of the given job arrays.
+
+        Returns None if the accounting could not be queried.
+        """
+        rows = []
+        for chunk in _chunks(array_ids):
+            output = self._run(self._sacct_cmd(chunk))
+            if output is None:
+                return None
+            rows.extend(_parse_rows(output, SACCT_FIELDS))
+        return rows
+
+    def sacct_usage(self, array_ids: Sequence[str]) -> List[Dict[str, str]]:
+        """Returns the `USAGE_FIELDS` accounting rows of the allocations and steps of the given job arrays."""
+        rows = []
+        for chunk in _chunks(array_ids):
+            output = self._run(self._sacct_cmd(chunk, USAGE_FIELDS, steps=True))
+            rows.extend(_parse_rows(output or "", USAGE_FIELDS))
+        return rows
+
+    async def sacct_async(self, array_ids: Sequence[str]) -> Optional[List[Dict[str, str]]]:
+        import asyncio
+
+        outputs = await asyncio.gather(
+            *(self._run_async(self._sacct_cmd(chunk)) for chunk in _chunks(array_ids))
+        )
+        if any(output is None for output in outputs):
+            return None
+        return [row for output in outputs for row in _parse_rows(output, SACCT_FIELDS)]
+
+    def max_array_size(self) -> Optional[int]:
+        """Returns the `MaxArraySize` of the cluster, or None if it could not be queried."""
+        output = self._run([self.scontrol_cmd, "show", "config"]) or ""
+        for line in output.splitlines():
+            key, _, value = line.partition("=")
+            if key.strip() == "MaxArraySize" and value.strip().isdigit():
+                return int(value.strip())
+        return None
+
+
+class SchedulerSnapshot:
+    """Scheduler view of a set of jobs, taken once and shared by every row of a dashboard."""
+
+    def __init__(
+        self,
+        jobs_info: Dict[str, Dict[str, str]],
+        queued_array_ids=(),
+        complete: bool = True,
+    ):
+        self.jobs_info = jobs_info
+        self.queued_array_ids = set(queued_array_ids)
+        # False if the queue or the accounting could not be queried, i.e. a job missing
+        # from them may still be queued, or may have failed.
+        self.complete = complete
+
+    def get_info(self, job_id) -> Dict[str, str]:
+        """Returns the scheduler info of a job (`State`, `NodeList`, ...), or an empty dict."""
+        job_id = _task_id(job_id)
+        return self.jobs_info.get(job_id) or self.jobs_info.get(_array_id(job_id), {})
+
+    def get_state(self, job_id) -> Optional[str]:
+        return self.get_info(job_id).get("State")
+
+    def is_queued(self, job_id) -> bool:
+        """Whether the job array of `job_id` still has tasks in the queue."""
+        return _array_id(job_id) in self.queued_array_ids
+
+
+def take_snapshot(job_ids: Iterable, backend: Optional[SlurmBackend] = None):
+    """Queries the scheduler once for all `job_ids`: `squeue` for live jobs, `sacct` for the others."""
+    backend = backend or SlurmBackend()
+    array_ids = {_array_id(job_id) for job_id in job_ids}
+    if not array_ids:
+        return SchedulerSnapshot({})
+    return _make_snapshot(array_ids, backend.sacct(sorted(array_ids)), backend.squeue())
+
+
+async def take_snapshot_async(job_ids: Iterable, backend: Optional[SlurmBackend] = None):
+    """Same as `take_snapshot`, running `squeue` and `sacct` concurrently."""
+    import asyncio
+
+    backend = backend or SlurmBackend()
+    array_ids = {_array_id(job_id) for job_id in job_ids}
+    if not array_ids:
+        return SchedulerSnapshot({})
+    sacct_rows, queue_rows = await asyncio.gather(
+        backend.sacct_async(sorted(array_ids)), backend.squeue_async()
+    )
+    return _make_snapshot(array_ids, sacct_rows, queue_rows)
+
+
+def _make_snapshot(
+    array_ids: Set[str],
+    sacct_rows: Optional[List[Dict[str, str]]],
+    queue_rows: Optional[List[Dict[str, str]]],
+) -> SchedulerSnapshot:
+    jobs_info = {}
+    for row in sacct_rows or []:
+        jobs_info[row["JobID"]] = row
+
+    queued_array_ids = set()
+    for row in queue_rows or []:
+        array_id = _array_id(row["JobID"])
+        if array_id in array_ids:
+            queued_array_ids.add(array_id)
+            # squeue is the live source of truth, let it override accounting data.
+            jobs_info[row["JobID"]] = {**jobs_info.get(row["JobID"], {}), **row}
+
+    complete = sacct_rows is not None and queue_rows is not None
+    return SchedulerSnapshot(jobs_info, queued_array_ids, complete)
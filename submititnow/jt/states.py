@@ -0,0 +1,135 @@
+import datetime as dt
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from submititnow.jt import store
+from submititnow.jt.scheduler import SchedulerSnapshot
+
+TERMINAL_STATES = ("COMPLETED", "FAILED", "CANCELLED")
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS job_states (
+        job_id TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        final_state TEXT NOT NULL,
+        exit_reason TEXT,
+        started_at TEXT,
+        ended_at TEXT,
+        recorded_at TEXT NOT NULL
+    )
+    """,
+)
+
+
+def is_terminal_state(status: str) -> bool:
+    return status.startswith(TERMINAL_STATES)
+
+
+def split_status(status: str):
+    """Splits a job status (as returned by `load_job_states`) into its state and its exit reason.
+
+    e.g. "FAILED: Out Of Memory" -> ("FAILED", "Out Of Memory")
+         "CANCELLED (terminated by user)" -> ("CANCELLED", "terminated by user")
+    """
+    for state in TERMINAL_STATES:
+        if status.startswith(state):
+            reason = status[len(state) :].strip(" :")
+            if reason.startswith("(") and reason.endswith(")"):
+                reason = reason[1:-1]
+            return state, reason or None
+    return status, None
+
+
+# Why a job failed, see `failure_class`.
+FAILURE_CLASSES = ("oom", "timeout", "node_fail", "preempted", "exception", "cancelled", "other")
+
+
+def failure_class(status: str) -> Optional[str]:
+    """Returns why a job with this status failed (see `FAILURE_CLASSES`), None if it did not."""
+    state, reason = split_status(status)
+    reason = reason or ""
+    if state == "COMPLETED" or not is_terminal_state(status):
+        return None
+    if reason == "Out Of Memory" or reason.startswith("OUT_OF_MEMORY"):
+        return "oom"
+    if reason == "Time Limit" or reason.startswith("TIMEOUT"):
+        return "timeout"
+    if reason == "Node Failure" or reason.startswith("NODE_FAIL"):
+        return "node_fail"
+    if reason == "preempted" or reason.startswith("PREEMPTED"):
+        return "preempted"
+    if reason == "Triggered an Exception":
+        return "exception"
+    if state == "CANCELLED":
+        return "cancelled"
+    return "other"
+
+
+def _needs_scheduler(status: str) -> bool:
+    # These statuses are inferred from the job missing in the queue, not from its logs.
+    return status.endswith("(before starting execution)")
+
+
+class JobStateStore:
+    """Per-experiment store of the jobs that reached a terminal state.
+
+    Once recorded, a job is never probed again by `jt jobs`.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = store.connect(self.db_path, _SCHEMA)
+        return self._conn
+
+    def load_terminal_states(self, job_ids: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """Returns the recorded status of the terminated jobs among `job_ids` (all if None)."""
+        if job_ids is None:
+            return dict(self.conn.execute("SELECT job_id, status FROM job_states"))
+        job_ids = [str(job_id) for job_id in job_ids]
+        states = dict(
+            store.select_in(
+                self.conn, "SELECT job_id, status FROM job_states WHERE job_id IN", job_ids
+            )
+        )
+        return {job_id: states[job_id] for job_id in job_ids if job_id in states}
+
+    def record(self, statuses: Dict[str, str], snapshot: Optional[SchedulerSnapshot] = None):
+        """Records the jobs of `statuses` that reached a terminal state."""
+        now = str(dt.datetime.now()).split(".")[0]
+        rows = []
+        for job_id, status in statuses.items():
+            if not is_terminal_state(status):
+                continue
+            if _needs_scheduler(status) and (snapshot is None or not snapshot.complete):
+                continue
+            info = snapshot.get_info(job_id) if snapshot else {}
+            final_state, exit_reason = split_status(status)
+            rows.append(
+                (
+                    str(job_id),
+                    status,
+                    final_state,
+                    exit_reason,
+                    info.get("Start"),
+                    info.get("End"),
+                    now,
+                )
+            )
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO job_states"
+                " (job_id, status, final_state, exit_reason, started_at, ended_at, recorded_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,36 @@
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Iterator, Tuple
+
+# Older SQLite versions allow at most 999 parameters per query.
+MAX_QUERY_PARAMS = 900
+
+
+def connect(db_path: Path, schema: Iterable[str] = ()) -> sqlite3.Connection:
+    """Opens the SQLite database at `db_path`, creating it along with `schema` if needed.
+
+    The databases live next to the experiment logs, which are often on a shared
+    NFS home, so we wait generously on locks held by concurrent launchers.
+    Connections may be handed over to another thread (e.g. by `run_sync`), but
+    must not be used by two threads at once.
+    """
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), timeout=60, check_same_thread=False)
+    with conn:
+        for statement in schema:
+            conn.execute(statement)
+    return conn
+
+
+def select_in(
+    conn: sqlite3.Connection, query: str, values: Iterable, chunk_size: int = MAX_QUERY_PARAMS
+) -> Iterator[Tuple]:
+    """Yields the rows of `query` for each of the `values`, a chunk of them at a time.
+
+    `query` ends with an `IN` clause, e.g. "SELECT job_id, status FROM job_states WHERE job_id IN".
+    """
+    values = list(dict.fromkeys(values))
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start : start + chunk_size]
+        yield from conn.execute(f"{query} ({', '.join('?' * len(chunk))})", chunk)
@@ -0,0 +1,161 @@
+import datetime as dt
+import json
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from submititnow.jt.logs import LogTailCache, timing_log_prefix
+from submititnow.jt.tracker import JobTiming
+
+TIMING_COLUMNS = ["Queue Wait", "Startup", "Run Time", "Peak RSS", "CPU Time"]
+
+STATS_COLUMNS = ["Metric", "Jobs", "p50", "p90", "p99", "Max"]
+
+PERCENTILES = (50, 90, 99)
+
+
+class JobDurations(NamedTuple):
+    """Where the time of a job went, in seconds, and its peak RSS in MB.
+
+    For packed points, the startup includes the points run before them in their task.
+    """
+
+    queue_wait: Optional[float]
+    startup: Optional[float]
+    run_time: Optional[float]
+    peak_rss_mb: Optional[float]
+    cpu_time_s: Optional[float]
+
+
+def timing_reads(job_id: str, filepaths: Dict[str, str]) -> List[Tuple[str, str]]:
+    """Returns the `(filepath, marker)` last lines that `read_job_timing` reads for a job."""
+    if "out" not in filepaths:
+        return []
+    reads = [(filepaths["out"], "timing")]
+    _, _, point = str(job_id).partition(":")
+    if point:
+        reads.append((filepaths["out"], f"timing:{point}"))
+    return reads
+
+
+def _parse_timing_line(line: Optional[str], point: Optional[str] = None) -> Dict[str, float]:
+    if not line:
+        return {}
+    try:
+        timing = json.loads(line[len(timing_log_prefix(point)) :])
+    except ValueError:
+        return {}
+    return timing if isinstance(timing, dict) else {}
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Returns the epoch time of a tracker or `sacct` timestamp, None for `Unknown` and the like."""
+    try:
+        return dt.datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def read_job_timing(
+    job_id: str,
+    filepaths: Dict[str, str],
+    log_cache: LogTailCache,
+    scheduled_at: Optional[float] = None,
+) -> Optional[JobTiming]:
+    """Returns the timing of a job from its last timing lines, or None if it logged none."""
+    lines = [
+        log_cache.last_line(filepath, marker)
+        for filepath, marker in timing_reads(job_id, filepaths)
+    ]
+    timing = _parse_timing_line(lines[0] if lines else None)
+    if len(lines) > 1:
+        # A packed point has its own times, the process start of its task is shared.
+        point_timing = _parse_timing_line(lines[1], job_id.partition(":")[2])
+        timing = {"started_at": timing.get("started_at"), **point_timing} if point_timing else {}
+    if not timing:
+        return None
+    return JobTiming(
+        scheduled_at,
+        timing.get("started_at"),
+        timing.get("user_started_at"),
+        timing.get("ended_at"),
+        timing.get("peak_rss_mb"),
+        timing.get("cpu_time_s"),
+    )
+
+
+def _elapsed(start: Optional[float], end: Optional[float]) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    return max(0.0, end - start)
+
+
+def job_durations(submitted_at: str, timing: JobTiming) -> JobDurations:
+    """Splits the time of a job since its submission into queue wait, startup and run time."""
+    submitted = parse_time(submitted_at)
+    started = timing.scheduled_at if timing.scheduled_at is not None else timing.started_at
+    return JobDurations(
+        _elapsed(submitted, started),
+        _elapsed(started, timing.user_started_at),
+        _elapsed(timing.user_started_at, timing.ended_at),
+        timing.peak_rss_mb,
+        timing.cpu_time_s,
+    )
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    minutes, seconds = divmod(int(seconds), 60)
+    if minutes < 60:
+        return f"{minutes}m{seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m"
+
+
+def format_memory(megabytes: Optional[float]) -> str:
+    if megabytes is None:
+        return "-"
+    if megabytes < 1024:
+        return f"{megabytes:.0f}M"
+    return f"{megabytes / 1024:.1f}G"
+
+
+_FORMATTERS = {
+    "queue_wait": format_duration,
+    "startup": format_duration,
+    "run_time": format_duration,
+    "peak_rss_mb": format_memory,
+    "cpu_time_s": format_duration,
+}
+
+
+def format_durations(durations: Optional[JobDurations]) -> Tuple[str, ...]:
+    """Returns the `TIMING_COLUMNS` cells of a job."""
+    if durations is None:
+        return ("-",) * len(TIMING_COLUMNS)
+    return tuple(
+        _FORMATTERS[field](value) for field, value in zip(JobDurations._fields, durations)
+    )
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Returns the nearest-rank `q`-th percentile of sorted `values`."""
+    rank = max(1, -(-len(values) * q // 100))
+    return values[int(rank) - 1]
+
+
+def timing_stats(durations: Iterable[JobDurations]) -> List[Tuple[str, ...]]:
+    """Returns one `STATS_COLUMNS` row per timing metric, over the jobs that reported it."""
+    durations = list(durations)
+    rows = []
+    for column, field in zip(TIMING_COLUMNS, JobDurations._fields):
+        values = sorted(
+            getattr(job, field) for job in durations if getattr(job, field) is not None
+        )
+        if not values:
+            rows.append((column, "0", "-", "-", "-", "-"))
+            continue
+        cells = [percentile(values, q) for q in PERCENTILES] + [values[-1]]
+        rows.append((column, str(len(values)), *map(_FORMATTERS[field], cells)))
+    return rows
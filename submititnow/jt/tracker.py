@@ -0,0 +1,262 @@
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+from submititnow.jt import store
+
+TRACKER_COLUMNS = ["Exp ID", "Date & Time", "Job ID", "Job Description", "Exp Info"]
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS tracker (
+        exp_id INTEGER NOT NULL,
+        submitted_at TEXT NOT NULL,
+        job_id TEXT NOT NULL UNIQUE,
+        job_description TEXT,
+        exp_info TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS tracker_exp_id ON tracker (exp_id)",
+    "CREATE INDEX IF NOT EXISTS tracker_submitted_at ON tracker (submitted_at)",
+    """
+    CREATE TABLE IF NOT EXISTS tracker_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS job_attempts (
+        job_id TEXT PRIMARY KEY,
+        retry_of TEXT NOT NULL,
+        attempt INTEGER NOT NULL,
+        failure TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS job_timings (
+        job_id TEXT PRIMARY KEY,
+        scheduled_at REAL,
+        started_at REAL,
+        user_started_at REAL,
+        ended_at REAL,
+        peak_rss_mb REAL,
+        cpu_time_s REAL
+    )
+    """,
+)
+
+
+class TrackerRow(NamedTuple):
+    exp_id: int
+    submitted_at: str
+    job_id: str
+    job_description: str
+    exp_info: Optional[str]
+
+
+class JobAttempt(NamedTuple):
+    """Resubmission of the job `retry_of`, which failed with `failure` (see `failure_class`)."""
+
+    job_id: str
+    retry_of: str
+    attempt: int
+    failure: str
+
+
+class JobTiming(NamedTuple):
+    """Epoch timestamps and resource usage of a finished job, see `submititnow.timing`.
+
+    `scheduled_at` is the start time reported by the scheduler, `started_at` the start
+    of the job's process and `user_started_at` the call of the job function.
+    """
+
+    scheduled_at: Optional[float]
+    started_at: Optional[float]
+    user_started_at: Optional[float]
+    ended_at: Optional[float]
+    peak_rss_mb: Optional[float]
+    cpu_time_s: Optional[float]
+
+
+def make_tracker_row(
+    submitted_at: str,
+    job_id,
+    job_description: str,
+    exp_info: Optional[str],
+    exp_id: Optional[int] = None,
+) -> TrackerRow:
+    """Makes a tracker row, the exp ID defaults to the job array ID of `job_id`."""
+    job_id = str(job_id)
+    exp_id = int(exp_id if exp_id is not None else job_id.split(":")[0].split("_")[0])
+    return TrackerRow(exp_id, submitted_at, job_id, job_description, exp_info)
+
+
+class TrackerStore:
+    """Tracker of the jobs launched by an experiment, stored in the experiment's SQLite database.
+
+    Rows can be looked up by exp ID and submission time through indices, and each
+    launch is written in a single transaction so that parallel launchers do not
+    interleave partial writes. The append-only `tracker.csv` of older versions is
+    imported (incrementally, by byte offset) whenever it has grown since the last import.
+    """
+
+    def __init__(self, db_path: Path, legacy_csv: Optional[Path] = None):
+        self.db_path = Path(db_path)
+        self.legacy_csv = Path(legacy_csv) if legacy_csv else None
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = store.connect(self.db_path, _SCHEMA)
+            if self.legacy_csv is not None:
+                self.import_csv(self.legacy_csv)
+        return self._conn
+
+    def append(self, rows: Iterable[TrackerRow]):
+        conn = self.conn
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT OR REPLACE INTO tracker"
+                " (exp_id, submitted_at, job_id, job_description, exp_info)"
+                " VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def import_csv(self, csv_path: Path) -> int:
+        """Imports the rows appended to a legacy `tracker.csv` since the last import.
+
+        Returns the number of imported rows.
+        """
+        try:
+            size = os.path.getsize(csv_path)
+        except FileNotFoundError:
+            return 0
+
+        key = f"imported:{csv_path}"
+        row = self._conn.execute(
+            "SELECT value FROM tracker_meta WHERE key = ?", (key,)
+        ).fetchone()
+        offset = int(row[0]) if row else 0
+        if offset >= size:
+            return 0
+
+        rows = []
+        with open(csv_path, "rb") as fp:
+            fp.seek(offset)
+            for line in fp:
+                if not line.endswith(b"\n"):
+                    # A launcher is still writing this line, pick it up next time.
+                    break
+                offset += len(line)
+                items = line.decode("utf-8", errors="replace").rstrip("\n").split("\t")
+                if len(items) < 3:
+                    continue
+                exp_info = items[3] if len(items) > 3 and items[3] else None
+                rows.append(make_tracker_row(items[0], items[1], items[2], exp_info))
+
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO tracker"
+                " (exp_id, submitted_at, job_id, job_description, exp_info)"
+                " VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tracker_meta (key, value) VALUES (?, ?)",
+                (key, str(offset)),
+            )
+        return len(rows)
+
+    def load(self, exp_id: Optional[int] = None, max_rows: int = -1) -> List[TrackerRow]:
+        """Returns the tracked jobs, most recent experiments first.
+
+        Args:
+            exp_id: Only return the jobs of this experiment ID.
+            max_rows: Max number of rows to return, -1 for all of them.
+        """
+        query = "SELECT exp_id, submitted_at, job_id, job_description, exp_info FROM tracker"
+        params = []
+        if exp_id:
+            query += " WHERE exp_id = ?"
+            params.append(int(exp_id))
+        query += " ORDER BY exp_id DESC, rowid ASC LIMIT ?"
+        params.append(max_rows)
+        return [TrackerRow(*row) for row in self.conn.execute(query, params)]
+
+    def load_jobs(self, job_id: str) -> List[TrackerRow]:
+        """Returns the tracked job `job_id`, or all the tasks (and packed points) of `job_id`."""
+        job_id = str(job_id)
+        rows = self.conn.execute(
+            "SELECT exp_id, submitted_at, job_id, job_description, exp_info FROM tracker"
+            " WHERE job_id = ? OR (job_id >= ? AND job_id < ?) OR (job_id >= ? AND job_id < ?)"
+            " ORDER BY rowid",
+            # `_` and `:` are followed by a backtick and `;` in ASCII: this selects
+            # the `<job_id>_*` and `<job_id>:*` IDs.
+            (job_id, f"{job_id}_", f"{job_id}`", f"{job_id}:", f"{job_id};"),
+        )
+        return [TrackerRow(*row) for row in rows]
+
+    def record_attempts(self, attempts: Iterable[JobAttempt]):
+        """Records the resubmissions of failed jobs, and notes their attempt in their description."""
+        attempts = list(attempts)
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO job_attempts (job_id, retry_of, attempt, failure)"
+                " VALUES (?, ?, ?, ?)",
+                attempts,
+            )
+            self.conn.executemany(
+                "UPDATE tracker SET job_description = job_description || ? WHERE job_id = ?",
+                ((f" (attempt {attempt.attempt})", attempt.job_id) for attempt in attempts),
+            )
+
+    def mark_checkpointed(self, exp_id: int):
+        """Records that the jobs of the launch `exp_id` requeue themselves when preempted or timed out."""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO tracker_meta (key, value) VALUES (?, '1')",
+                (f"checkpointed:{int(exp_id)}",),
+            )
+
+    def load_checkpointed(self) -> Set[int]:
+        """Returns the exp IDs of the launches marked with `mark_checkpointed`."""
+        rows = self.conn.execute(
+            "SELECT key FROM tracker_meta WHERE key LIKE 'checkpointed:%'"
+        )
+        return {int(row[0].split(":", 1)[1]) for row in rows}
+
+    def load_attempts(self, job_ids: Iterable[str]) -> Dict[str, JobAttempt]:
+        """Returns how the resubmitted jobs among `job_ids` came to be."""
+        rows = store.select_in(
+            self.conn,
+            "SELECT job_id, retry_of, attempt, failure FROM job_attempts WHERE job_id IN",
+            map(str, job_ids),
+        )
+        return {row[0]: JobAttempt(*row) for row in rows}
+
+    def record_timings(self, timings: Dict[str, JobTiming]):
+        """Records the timings of finished jobs."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO job_timings"
+                " (job_id, scheduled_at, started_at, user_started_at, ended_at, peak_rss_mb, cpu_time_s)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((job_id, *timing) for job_id, timing in timings.items()),
+            )
+
+    def load_timings(self, job_ids: Iterable[str]) -> Dict[str, JobTiming]:
+        """Returns the recorded timings of the `job_ids` that finished."""
+        rows = store.select_in(
+            self.conn,
+            "SELECT job_id, scheduled_at, started_at, user_started_at, ended_at, peak_rss_mb,"
+            " cpu_time_s FROM job_timings WHERE job_id IN",
+            map(str, job_ids),
+        )
+        return {row[0]: JobTiming(*row[1:]) for row in rows}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -1,9 +1,19 @@
 import os
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Optional, Dict
-import pandas as pd
-import scandir
+from typing import TYPE_CHECKING, NamedTuple, Optional, Dict, Iterable, List, Tuple, Union
+
+from submititnow.jt.catalog import Catalog
+from submititnow.jt.index import JobFileIndex
+from submititnow.jt.logs import LogTailCache, requeue_log_prefix
+from submititnow.jt.scheduler import SchedulerSnapshot, SlurmBackend, take_snapshot
+from submititnow.jt.states import is_terminal_state
+from submititnow.jt.tracker import TRACKER_COLUMNS, TrackerRow, TrackerStore
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from submititnow.jt.timings import JobDurations
 
 __FALLBACK_SUBMITITNOW_DIR = "~/.submititnow"
 
@@ -13,14 +23,45 @@ SUBMITITNOW_ROOT_DIR = Path(
 
 EXPERIMENTS_ROOT_DIR = SUBMITITNOW_ROOT_DIR / "experiments"
 
+CATALOG_FILE = SUBMITITNOW_ROOT_DIR / "catalog.db"
+
+JOB_STATE_COLUMNS = [
+    "Exp ID",
+    "Date & Time",
+    "Job Status",
+    "Job ID",
+    "Job Description",
+    "Exp Info",
+]
+
+
+# Statuses of the jobs killed by SLURM, by a substring of the last `slurmstepd` error line.
+SLURM_ERROR_STATUSES = {
+    "DUE TO TIME LIMIT": "FAILED: Time Limit",
+    "DUE TO PREEMPTION": "CANCELLED (preempted)",
+    "DUE TO NODE FAILURE": "FAILED: Node Failure",
+    "oom-kill": "FAILED: Out Of Memory",
+    "Exceeded job memory limit": "FAILED: Out Of Memory",
+}
+
+
+class JobStateRow(NamedTuple):
+    exp_id: int
+    submitted_at: str
+    job_status: str
+    job_id: str
+    job_description: str
+    exp_info: str
+
 
 def get_running_job_ids():
-    username = os.environ["USER"]
-    squeue_rows = os.popen(f"squeue -u {username}").read().splitlines()[1:]
-    return list(map(lambda x: x.strip().split()[0].split("_")[0], squeue_rows))
+    squeue_rows = SlurmBackend().squeue() or []
+    return list(map(lambda row: row["JobID"].split("_")[0], squeue_rows))
 
 
 def list_files(path):
+    import scandir
+
     files = []
     # r=root, d=directories, f = files
     for r, d, f in scandir.walk(str(path)):
@@ -28,23 +69,65 @@ def list_files(path):
             yield os.path.join(r, file)
 
 
+def find_exp_name(exp_id) -> Optional[str]:
+    """Returns the name of the experiment that launched the job array `exp_id`."""
+    catalog = Catalog(CATALOG_FILE)
+    exp_name = catalog.find_exp_name(exp_id)
+    if exp_name is None and EXPERIMENTS_ROOT_DIR.exists():
+        # Experiments launched before the catalog existed: probe each experiment's
+        # logs folder for the submission script and remember the owner.
+        for entry in os.scandir(EXPERIMENTS_ROOT_DIR):
+            sh_file = os.path.join(entry.path, "submitit_logs", f"{exp_id}_submission.sh")
+            if os.path.exists(sh_file):
+                exp_name = entry.name
+                _record_tracked_launches(catalog, exp_name)
+                if catalog.find_exp_name(exp_id) is None:
+                    catalog.record_launch(exp_id, exp_name)
+                break
+    catalog.close()
+    return exp_name
+
+
+def _record_tracked_launches(catalog: Catalog, exp_name: str):
+    tracker = JTExp(exp_name).tracker
+    launches = {}
+    for row in tracker.load():
+        launched_at, num_jobs, array_ids = launches.get(row.exp_id, (row.submitted_at, 0, {}))
+        array_ids[row.job_id.split(":")[0].split("_")[0]] = None
+        launches[row.exp_id] = (min(launched_at, row.submitted_at), num_jobs + 1, array_ids)
+    tracker.close()
+    for exp_id, (launched_at, num_jobs, array_ids) in launches.items():
+        if catalog.find_exp_name(exp_id) is None:
+            catalog.record_launch(exp_id, exp_name, launched_at, num_jobs, array_ids)
+
+
+def sync_catalog(catalog: Catalog):
+    """Records in the catalog the experiments launched before it existed, from their trackers."""
+    if not EXPERIMENTS_ROOT_DIR.exists():
+        return
+    known_exp_names = {summary.exp_name for summary in catalog.list_experiments()}
+    for entry in os.scandir(EXPERIMENTS_ROOT_DIR):
+        if entry.name not in known_exp_names and JTExp(entry.name).exists():
+            _record_tracked_launches(catalog, entry.name)
+
+
 def find_job_files(job_id, task_id):
+    exp_name = find_exp_name(job_id)
+    if exp_name is None:
+        return {}
+    job_index = JTExp(exp_name).job_index
     files = {}
-    job_id_tag = f"{job_id}_{task_id}" if task_id is not None else str(job_id)
-    for path in list_files(EXPERIMENTS_ROOT_DIR):
-        if path.endswith(".sh") and str(job_id) in path:
-            files["sh"] = path
-        elif job_id_tag in path:
-            name = ext = path.rsplit(".")[-1]
-            if ext == "pkl":
-                tag = name.rsplit("_")[-1]
-                files[tag] = path
-            else:
-                files[ext] = path
+    if task_id is not None:
+        files = job_index.lookup(f"{job_id}_{task_id}")
+    if set(files) <= {"sh"}:
+        files = {**files, **job_index.lookup(str(job_id))}
+    job_index.close()
     return files
 
 
 def get_job_filepaths(job_task: str) -> Dict[str, str]:
+    # Points packed in an array task (`<job_task>:<k>`) share the files of the task.
+    job_task = job_task.split(":")[0]
     if "_" in job_task:
         job_id, task_id = job_task.split("_")
     else:
@@ -56,41 +139,74 @@ def get_job_filepath(job_task: str, file_type: str) -> str:
     return get_job_filepaths(job_task)[file_type]
 
 
-def load_job_states(job_id):
+def load_job_states(
+    job_id,
+    filepaths: Optional[Dict[str, str]] = None,
+    snapshot: Optional[SchedulerSnapshot] = None,
+    log_cache: Optional[LogTailCache] = None,
+):
     job_id = str(job_id)
-    filepaths = get_job_filepaths(job_id)
-    running_job_ids = get_running_job_ids()
-
+    if filepaths is None:
+        filepaths = get_job_filepaths(job_id)
+    if snapshot is None:
+        snapshot = take_snapshot([job_id])
+    if log_cache is None:
+        log_cache = LogTailCache()
+
+    job_task, _, point = job_id.partition(":")
+    task_state = _load_task_state(job_task, filepaths, snapshot, log_cache)
+    if point:
+        return _load_point_state(task_state, filepaths, point, log_cache)
+    return task_state
+
+
+def log_reads(job_id, filepaths: Dict[str, str]) -> List[Tuple[str, str]]:
+    """Returns the `(filepath, marker)` last lines `load_job_states` reads for a job."""
+    if "out" not in filepaths:
+        return []
+    reads = [(filepaths["out"], "submitit")]
+    if "err" in filepaths:
+        reads.append((filepaths["err"], "slurm"))
+    _, _, point = str(job_id).partition(":")
+    if point:
+        reads.append((filepaths["out"], f"point:{point}"))
+    return reads
+
+
+# Last lines submitit logs once a preempted or timed out task requeued itself.
+_REQUEUED_MESSAGES = ("Requeued job", "Exiting gracefully after preemption/timeout")
+
+
+def _load_task_state(
+    job_id: str,
+    filepaths: Dict[str, str],
+    snapshot: SchedulerSnapshot,
+    log_cache: LogTailCache,
+):
     if "sh" not in filepaths:
         return "UNSUBMITTED"
 
     if "out" not in filepaths and "sh" in filepaths:
-        if job_id.split("_")[0] in running_job_ids:
+        if snapshot.is_queued(job_id):
             return "PENDING"
+        elif snapshot.get_state(job_id) in {"FAILED", "NODE_FAIL", "BOOT_FAIL"}:
+            return f"FAILED: {snapshot.get_state(job_id)} (before starting execution)"
+        elif not snapshot.complete:
+            # The queue could not be queried: a job missing from it may still be queued.
+            return "UNKNOWN"
         else:
             return "CANCELLED (before starting execution)"
 
-    out_filepath = filepaths["out"]
-    err_filepath = filepaths["err"]
-
-    with open(out_filepath) as fp:
-        out_lines = list(filter(lambda l: l.startswith("submitit "), fp.readlines()))
+    out_line = log_cache.last_line(filepaths["out"], "submitit")
+    err_line = log_cache.last_line(filepaths.get("err"), "slurm")
 
-    with open(err_filepath) as fp:
-        err_lines = list(
-            filter(
-                lambda l: l.startswith("srun: ") or "slurmstepd: " in l,
-                fp.readlines(),
-            )
-        )
-
-    if not out_lines:
+    if not out_line:
         return "PENDING"
 
-    prefix, msg = out_lines[-1].split(" - ")
+    prefix, msg = out_line.split(" - ", 1)
 
     def get_error_msg():
-        return err_lines[-1].split(":", 4)[-1].strip()
+        return err_line.split(":", 4)[-1].strip()
 
     if "completed successfully" in msg:
         return "completed".upper()
@@ -98,8 +214,19 @@ def load_job_states(job_id):
     elif "triggered an exception" in msg:
         return "FAILED: Triggered an Exception"
 
-    if err_lines and "error" in err_lines[-1]:
-        if "CANCELLED" in err_lines[-1]:
+    # A task preempted or timed out that requeued itself is live again: its logs are those of
+    # its previous run until it restarts, whatever the scheduler reports in between.
+    if msg.startswith(_REQUEUED_MESSAGES):
+        return "RUNNING" if snapshot.get_state(job_id) == "RUNNING" else "PENDING"
+
+    # A requeued task that restarted logs a requeue line, after the errors of its previous runs.
+    restarted = err_line is not None and err_line.startswith(requeue_log_prefix())
+    scheduler_state = snapshot.get_state(job_id) if snapshot.is_queued(job_id) else None
+    if err_line and "error" in err_line and not restarted and scheduler_state != "RUNNING":
+        for marker, status in SLURM_ERROR_STATUSES.items():
+            if marker in err_line:
+                return status
+        if "CANCELLED" in err_line:
             return "CANCELLED (terminated by user)"
         else:
             return "FAILED: " + get_error_msg()
@@ -110,6 +237,47 @@ def load_job_states(job_id):
     return msg
 
 
+def _load_point_state(
+    task_state: str, filepaths: Dict[str, str], point: str, log_cache: LogTailCache
+):
+    """Returns the state of the `point`-th job params packed in an array task."""
+    if "out" not in filepaths:
+        return task_state
+
+    point_line = log_cache.last_line(filepaths["out"], f"point:{point}")
+    msg = point_line.split(" - ", 1)[-1] if point_line else ""
+    if "completed successfully" in msg:
+        return "COMPLETED"
+    elif "triggered an exception" in msg:
+        return "FAILED: Triggered an Exception"
+
+    if is_terminal_state(task_state):
+        if task_state == "COMPLETED":
+            return "CANCELLED (not run by its packed task)"
+        # The task was killed (e.g. out of memory or time) before this point finished.
+        return task_state
+
+    if "Starting" in msg:
+        return "RUNNING"
+    return "PENDING"
+
+
+def make_job_state_rows(
+    rows: Iterable[TrackerRow], statuses: Dict[str, str]
+) -> List[JobStateRow]:
+    return [
+        JobStateRow(
+            row.exp_id,
+            row.submitted_at,
+            statuses[row.job_id],
+            row.job_id,
+            row.job_description,
+            row.exp_info,
+        )
+        for row in rows
+    ]
+
+
 @dataclass
 class JTExp:
     exp_name: str
@@ -118,42 +286,151 @@ class JTExp:
     def exp_dir(self):
         return EXPERIMENTS_ROOT_DIR / self.exp_name
 
+    @property
+    def db_file(self):
+        return self.exp_dir / "jt.db"
+
     @property
     def tracker_file(self):
+        return self.db_file
+
+    @property
+    def legacy_tracker_file(self):
         return self.exp_dir / "tracker.csv"
 
     @property
     def logs_dir(self):
         return self.exp_dir / "submitit_logs"
 
+    @property
+    def job_index(self):
+        return JobFileIndex(self.logs_dir, self.db_file)
+
+    @property
+    def tracker(self):
+        return TrackerStore(self.tracker_file, self.legacy_tracker_file)
+
     def exists(self):
         return (
             self.exp_dir.exists()
-            and self.tracker_file.exists()
+            and (self.tracker_file.exists() or self.legacy_tracker_file.exists())
             and self.logs_dir.exists()
         )
 
-    def load_csv(self):
-        col_names = ["Date & Time", "Job ID", "Job Description", "Exp Info"]
-        df = pd.read_csv(
-            self.tracker_file, delimiter="\t", names=col_names, header=None
-        )
-        df["Exp Info"] = df["Exp Info"].fillna("Not Found in tracker")
-        job_series = df["Job ID"].map(lambda x: int(str(x).split("_")[0]))
-        df.insert(0, "Exp ID", job_series)
-        return df
+    def load_rows(self, exp_id: Optional[int] = None, max_rows: int = -1) -> List[TrackerRow]:
+        """Returns the tracked jobs, most recent experiments first, without needing pandas."""
+        tracker = self.tracker
+        rows = tracker.load(exp_id, max_rows)
+        tracker.close()
+        return [
+            row if row.exp_info is not None else row._replace(exp_info="Not Found in tracker")
+            for row in rows
+        ]
+
+    def load_csv(self, exp_id: Optional[int] = None, max_rows: int = -1) -> "pd.DataFrame":
+        """Returns the tracked jobs as a DataFrame (requires pandas), see `load_rows` for `TrackerRow`s."""
+        import pandas as pd
+
+        return pd.DataFrame(self.load_rows(exp_id, max_rows), columns=TRACKER_COLUMNS)
+
+    def load_job_statuses(self, job_ids: Iterable) -> Dict[str, str]:
+        """Returns the status of each job, only probing the jobs that are not terminated yet."""
+        probe = JobStatusProbe(self)
+        statuses = probe.probe(job_ids)
+        probe.close()
+        return statuses
+
+    def prepare_job_states(
+        self, max_rows: int = 20, exp_id: Optional[int] = None
+    ) -> List[JobStateRow]:
+        """Returns the tracked jobs with their current status, as `JOB_STATE_COLUMNS` rows."""
+        rows = self.load_rows(exp_id, max_rows)
+        statuses = self.load_job_statuses(row.job_id for row in rows)
+        return make_job_state_rows(rows, statuses)
+
+    def load_job_durations(
+        self, rows: Iterable[Union[TrackerRow, JobStateRow]]
+    ) -> Dict[str, "JobDurations"]:
+        """Returns the durations of the tracked jobs that finished and logged their timings."""
+        from submititnow.jt.timings import job_durations
+
+        rows = list(rows)
+        tracker = self.tracker
+        timings = tracker.load_timings(row.job_id for row in rows)
+        tracker.close()
+        return {
+            row.job_id: job_durations(row.submitted_at, timings[row.job_id])
+            for row in rows
+            if row.job_id in timings
+        }
+
+    def load_requeue_counts(
+        self, rows: Iterable[Union[TrackerRow, JobStateRow]]
+    ) -> Dict[str, int]:
+        """Returns how many times each checkpointed job requeued itself, for those that did.
+
+        Only the logs of the jobs launched with checkpointing are read.
+        """
+        tracker = self.tracker
+        checkpointed = tracker.load_checkpointed()
+        tracker.close()
+        job_ids = [row.job_id for row in rows if int(row.exp_id) in checkpointed]
+        if not job_ids:
+            return {}
+        job_index = self.job_index
+        job_index.refresh()
+        log_cache = LogTailCache(self.db_file)
+        counts = {}
+        for job_id in job_ids:
+            out_file = job_index.lookup(job_id, refresh=False).get("out")
+            line = log_cache.last_line(out_file, "requeue")
+            if line:
+                counts[job_id] = int(line[len(requeue_log_prefix()) :])
+        log_cache.close()
+        job_index.close()
+        return counts
 
     def prepare_job_states_df(self, max_rows: int = 20, exp_id: Optional[int] = None):
-        df = self.load_csv()
-        df = df[df["Exp ID"] == exp_id] if exp_id else df
-        df = df.sort_values(by=["Exp ID"], ascending=False)
-        if max_rows != -1:
-            df = df.head(max_rows)
-        status_series = df["Job ID"].apply(load_job_states)
-        df.insert(2, "Job Status", status_series)
-        return df
+        import pandas as pd
+
+        return pd.DataFrame(self.prepare_job_states(max_rows, exp_id), columns=JOB_STATE_COLUMNS)
+
+
+class JobStatusProbe:
+    """Synchronous wrapper of the `StateEngine` of an experiment, used by `jt jobs` and `jt watch`."""
+
+    def __init__(self, exp: JTExp):
+        from submititnow.jt.engine import StateEngine
+
+        self.engine = StateEngine(exp.db_file, exp.logs_dir)
+
+    def probe(self, job_ids: Iterable, query_scheduler: bool = True) -> Dict[str, str]:
+        """Returns the status of each job, see `StateEngine.probe`."""
+        from submititnow.jt.engine import run_sync
+
+        return run_sync(self.engine.probe(job_ids, query_scheduler))
+
+    def close(self):
+        self.engine.close()
 
 
 def load_job_trackers(exp_name: Optional[str] = None):
-    # TODO(maharshi95): implement loading all trackers if exp_name is None
-    raise NotImplementedError
+    """Returns the trackers of `exp_name`, or of all the experiments in the catalog if None."""
+    import pandas as pd
+
+    if exp_name is None:
+        catalog = Catalog(CATALOG_FILE)
+        sync_catalog(catalog)
+        exp_names = [summary.exp_name for summary in catalog.list_experiments()]
+        catalog.close()
+    else:
+        exp_names = [exp_name]
+
+    dfs = []
+    for name in exp_names:
+        df = pd.DataFrame(JTExp(name).load_rows(), columns=TRACKER_COLUMNS)
+        df.insert(0, "Exp Name", name)
+        dfs.append(df)
+    if not dfs:
+        return pd.DataFrame(columns=["Exp Name", *TRACKER_COLUMNS])
+    return pd.concat(dfs, ignore_index=True)
@@ -0,0 +1,142 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+# Filesystems on which the changes made by other hosts (e.g. the compute nodes) do not
+# trigger local notifications: they are watched by polling.
+NETWORK_FILESYSTEMS = {
+    "nfs",
+    "nfs4",
+    "lustre",
+    "gpfs",
+    "beegfs",
+    "ceph",
+    "cifs",
+    "smb3",
+    "panfs",
+    "fuse.sshfs",
+}
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = os.O_CLOEXEC
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def filesystem_type(path: Path) -> Optional[str]:
+    """Returns the type of the filesystem `path` is on, from `/proc/mounts` (Linux only)."""
+    try:
+        with open("/proc/mounts") as fp:
+            mounts = [line.split() for line in fp]
+    except OSError:
+        return None
+    path = os.path.realpath(path)
+    best_mount, best_type = "", None
+    for fields in mounts:
+        if len(fields) < 3:
+            continue
+        mount_point = fields[1].replace("\\040", " ")
+        is_parent = path == mount_point or path.startswith(mount_point.rstrip("/") + "/")
+        if is_parent and len(mount_point) > len(best_mount):
+            best_mount, best_type = mount_point, fields[2]
+    return best_type
+
+
+class PollingWatcher:
+    """Detects the files of a directory that changed by comparing their (size, mtime) between scans."""
+
+    def __init__(self, directory: Path, interval: float = 2.0):
+        self.directory = Path(directory)
+        self.interval = interval
+        self._stats = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        stats = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    stats[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            pass
+        return stats
+
+    def wait(self, timeout: float) -> Set[str]:
+        """Returns the names of the files that changed, or an empty set after `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        while True:
+            time.sleep(max(0.0, min(self.interval, deadline - time.monotonic())))
+            stats = self._scan()
+            changed = {name for name, stat in stats.items() if self._stats.get(name) != stat}
+            self._stats = stats
+            if changed or time.monotonic() >= deadline:
+                return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Detects the files of a directory that changed from the Linux inotify events."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        if libc.inotify_add_watch(self._fd, os.fsencode(self.directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"Cannot watch {self.directory}")
+
+    def wait(self, timeout: float) -> Set[str]:
+        """Returns the names of the files that changed, or an empty set after `timeout` seconds."""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        # Let the bursts of writes of a job settle into a single update.
+        time.sleep(0.1)
+        changed = set()
+        while True:
+            try:
+                buffer = os.read(self._fd, 1 << 16)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(buffer):
+                _, _, _, name_length = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = buffer[offset : offset + name_length].rstrip(b"\0")
+                offset += name_length
+                if name:
+                    changed.add(os.fsdecode(name))
+
+    def close(self):
+        os.close(self._fd)
+
+
+def make_watcher(directory: Path, poll: bool = False, interval: float = 2.0):
+    """Returns an inotify watcher of `directory` when possible, a polling watcher otherwise.
+
+    Polling is used on network filesystems, on which inotify misses the writes of the
+    compute nodes, and wherever inotify is not available.
+    """
+    if not poll and filesystem_type(directory) not in NETWORK_FILESYSTEMS:
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directory, interval)
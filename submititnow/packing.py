@@ -0,0 +1,98 @@
+import argparse
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, List, NamedTuple, Optional
+
+import cloudpickle
+
+from submititnow.jt.logs import point_log_prefix
+from submititnow.timing import print_timing, resource_usage
+
+
+class PointResult(NamedTuple):
+    """Outcome of one job params run by a `PackedJob`: its return value, or the formatted traceback."""
+
+    completed: bool
+    value: Any
+
+
+def _print_point_timing(point: int, user_started_at: float, cpu_time_before: float):
+    usage = resource_usage(children=False)
+    timing = {
+        "user_started_at": user_started_at,
+        "ended_at": time.time(),
+        # The peak RSS of the process that ran the point, which may have run others before.
+        "peak_rss_mb": usage["peak_rss_mb"],
+        "cpu_time_s": round(usage["cpu_time_s"] - cpu_time_before, 2),
+    }
+    print_timing(timing, point)
+
+
+def _run_point(job_func: Callable, point: int, job_param: argparse.Namespace):
+    # These status lines are what `jt jobs` reads to report the state of each point.
+    prefix = point_log_prefix(point)
+    print(f"{prefix}Starting", flush=True)
+    user_started_at = time.time()
+    cpu_time_before = resource_usage(children=False)["cpu_time_s"]
+    try:
+        result = job_func(job_param)
+    except Exception:
+        error = traceback.format_exc()
+        _print_point_timing(point, user_started_at, cpu_time_before)
+        print(f"{prefix}Job point triggered an exception", flush=True)
+        print(f"{prefix}Job point triggered an exception\n{error}", file=sys.stderr, flush=True)
+        return PointResult(False, error)
+    _print_point_timing(point, user_started_at, cpu_time_before)
+    print(f"{prefix}Job point completed successfully", flush=True)
+    return PointResult(True, result)
+
+
+# Job function of a pool worker process, set once by `_init_worker`.
+_worker_job_func: Optional[Callable] = None
+
+
+def _init_worker(job_func_payload: bytes):
+    # Job functions are often defined in `__main__`, which plain pickle cannot send to the
+    # pool processes: ship them the way submitit does, with cloudpickle.
+    global _worker_job_func
+    _worker_job_func = cloudpickle.loads(job_func_payload)
+
+
+def _run_worker_point(point: int, job_param: argparse.Namespace):
+    return _run_point(_worker_job_func, point, job_param)
+
+
+class PackedJob:
+    """Runs several job params inside a single array task.
+
+    The points run one after the other, or in a local process pool of `workers`
+    processes inside the allocation. A failing point does not stop the others, the
+    task returns one `PointResult` per point.
+    """
+
+    def __init__(self, job_func: Callable, workers: int = 1):
+        self.job_func = job_func
+        self.workers = workers
+        # Keep the function names, `Experiment` describes jobs by them.
+        self.__module__ = job_func.__module__
+        self.__qualname__ = job_func.__qualname__
+
+    def __call__(self, job_params: List[argparse.Namespace]) -> List[PointResult]:
+        if self.workers <= 1 or len(job_params) <= 1:
+            return [
+                _run_point(self.job_func, point, job_param)
+                for point, job_param in enumerate(job_params)
+            ]
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(cloudpickle.dumps(self.job_func),),
+        ) as executor:
+            futures = [
+                executor.submit(_run_worker_point, point, job_param)
+                for point, job_param in enumerate(job_params)
+            ]
+            return [future.result() for future in futures]
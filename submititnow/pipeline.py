@@ -0,0 +1,218 @@
+import datetime as dt
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import submitit
+
+from submititnow.experiment_lib import Experiment
+from submititnow.jt import utils
+from submititnow.jt.catalog import Catalog, PipelineStage
+
+DEPENDENCY_TYPES = ("afterok", "aftercorr")
+
+
+def _split(value: str) -> List[str]:
+    return [item for item in value.split(",") if item]
+
+
+def dependency_spec(upstream: Sequence[PipelineStage], dependency: str) -> Optional[str]:
+    """Returns the SLURM `--dependency` of a stage on its upstream stages, None if they are all done.
+
+    With `afterok`, the stage starts once every job of its upstream stages completed. With
+    `aftercorr`, its task k starts once task k of its single upstream stage completed.
+    """
+    if dependency not in DEPENDENCY_TYPES:
+        raise ValueError(f"dependency must be one of {DEPENDENCY_TYPES}, got {dependency}")
+    array_ids = [array_id for stage in upstream for array_id in _split(stage.array_ids)]
+    if dependency == "aftercorr" and (len(upstream) != 1 or len(array_ids) > 1):
+        raise ValueError(
+            "aftercorr dependencies need a single upstream stage submitted as a single job array"
+        )
+    if not array_ids:
+        # The jobs of the upstream stages were all cached, or did not run on SLURM.
+        return None
+    return f"{dependency}:{':'.join(array_ids)}"
+
+
+def _num_tasks(experiment: Experiment, tasks_per_job: int) -> int:
+    return -(-len(experiment.job_params) // tasks_per_job)
+
+
+def launch_stage(
+    pipeline_name: str,
+    pipeline_id: str,
+    stage: str,
+    experiment: Experiment,
+    slurm_params: Dict[str, Any],
+    upstream: Sequence[PipelineStage] = (),
+    dependency: str = "afterok",
+    **launch_options,
+) -> Tuple[List[submitit.Job], PipelineStage]:
+    """Launches an experiment as a stage of a pipeline run, returns its jobs and its record.
+
+    The stage is submitted right away: SLURM holds its jobs until their dependency on
+    the upstream stages is satisfied, and cancels them if it never is.
+    """
+    if launch_options.get("retry") is not None:
+        raise ValueError("Pipeline stages cannot be retried, as retrying waits for the jobs")
+    tasks_per_job = launch_options.get("tasks_per_job", 1)
+    spec = dependency_spec(upstream, dependency)
+    if dependency == "aftercorr" and spec is not None:
+        # Task k of the stage must run the k-th job params: no completed job is skipped.
+        launch_options["skip_completed"] = False
+        num_tasks = _num_tasks(experiment, tasks_per_job)
+        if num_tasks != upstream[0].num_tasks:
+            raise ValueError(
+                f"aftercorr dependencies need as many tasks as the upstream stage"
+                f" {upstream[0].stage!r}: {num_tasks} != {upstream[0].num_tasks}"
+            )
+    if spec is not None:
+        slurm_params = dict(slurm_params)
+        slurm_params["slurm_additional_parameters"] = {
+            **(slurm_params.get("slurm_additional_parameters") or {}),
+            "dependency": spec,
+            "kill_on_invalid_dep": "yes",
+        }
+
+    jobs = experiment.launch(slurm_params, **launch_options)
+    submitted = [job for job in jobs if isinstance(job, submitit.Job)]
+    # Only SLURM job arrays can be depended on, e.g. not the jobs of the local executor.
+    array_ids = dict.fromkeys(
+        job.job_id.split("_")[0] for job in submitted if "_" in job.job_id
+    )
+    record = PipelineStage(
+        pipeline_name,
+        pipeline_id,
+        stage,
+        experiment.exp_name,
+        experiment.exp_id,
+        ",".join(array_ids),
+        len(submitted),
+        ",".join(upstream_stage.stage for upstream_stage in upstream),
+        dependency,
+        dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    )
+    catalog = Catalog(utils.CATALOG_FILE)
+    catalog.record_stage(record)
+    catalog.close()
+    return jobs, record
+
+
+def new_pipeline_id() -> str:
+    return dt.datetime.now().strftime("%Y%m%d-%H%M%S")
+
+
+def resolve_stage_run(
+    pipeline_name: str, stage: str, after: Sequence[str]
+) -> Tuple[str, List[PipelineStage]]:
+    """Returns the pipeline run of a stage launched on its own (e.g. by `slaunch`), and its upstream stages.
+
+    A stage joins the latest run of the pipeline, unless this run already has it: the
+    stage then starts a new run, which requires it to have no upstream stages.
+    """
+    catalog = Catalog(utils.CATALOG_FILE)
+    stages = {record.stage: record for record in catalog.list_stages(pipeline_name)}
+    catalog.close()
+    if not stages or stage in stages:
+        if after:
+            raise ValueError(
+                f"Stage {stage!r} starts a new run of pipeline {pipeline_name!r},"
+                f" which has no stages {list(after)} yet"
+            )
+        return new_pipeline_id(), []
+    missing = [name for name in after if name not in stages]
+    if missing:
+        raise ValueError(f"The latest run of pipeline {pipeline_name!r} has no stages {missing}")
+    pipeline_id = next(iter(stages.values())).pipeline_id
+    return pipeline_id, [stages[name] for name in after]
+
+
+class _Stage(NamedTuple):
+    experiment: Experiment
+    slurm_params: Dict[str, Any]
+    after: Sequence[str]
+    dependency: str
+    launch_options: Dict[str, Any]
+
+
+class Pipeline:
+    """Stages of experiments submitted all at once, each starting as soon as the stages it depends on are done.
+
+    Stages fan out (several stages after the same one) and fan in (a stage after several
+    ones). All of them are tracked as one run of the pipeline, see `jt pipeline`.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages: Dict[str, _Stage] = {}
+        self.pipeline_id: Optional[str] = None
+
+    def add_stage(
+        self,
+        name: str,
+        experiment: Experiment,
+        slurm_params: Dict[str, Any],
+        after: Sequence[str] = (),
+        dependency: str = "afterok",
+        **launch_options,
+    ) -> "Pipeline":
+        """Adds a stage running `experiment` after the stages `after` (see `dependency_spec`).
+
+        The `launch_options` are passed to `Experiment.launch`.
+        """
+        if name in self.stages:
+            raise ValueError(f"Pipeline {self.name!r} already has a stage {name!r}")
+        missing = [stage for stage in after if stage not in self.stages]
+        if missing:
+            raise ValueError(f"Stages {missing} must be added before stage {name!r}")
+        if dependency not in DEPENDENCY_TYPES:
+            raise ValueError(f"dependency must be one of {DEPENDENCY_TYPES}, got {dependency}")
+        if dependency == "aftercorr" and len(after) != 1:
+            raise ValueError(f"Stage {name!r} needs a single upstream stage for aftercorr dependencies")
+        self.stages[name] = _Stage(experiment, slurm_params, list(after), dependency, launch_options)
+        return self
+
+    def _launch_options(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the launch options of each stage, checking the aftercorr dependencies first.
+
+        Task k of both stages of an aftercorr dependency must run their k-th job params:
+        neither of them skips its completed jobs.
+        """
+        launch_options = {name: dict(stage.launch_options) for name, stage in self.stages.items()}
+        for name, stage in self.stages.items():
+            if stage.dependency != "aftercorr":
+                continue
+            upstream = stage.after[0]
+            num_tasks = _num_tasks(stage.experiment, launch_options[name].get("tasks_per_job", 1))
+            upstream_num_tasks = _num_tasks(
+                self.stages[upstream].experiment, launch_options[upstream].get("tasks_per_job", 1)
+            )
+            if num_tasks != upstream_num_tasks:
+                raise ValueError(
+                    f"aftercorr dependencies need as many tasks as the upstream stage"
+                    f" {upstream!r}: {num_tasks} != {upstream_num_tasks}"
+                )
+            launch_options[name]["skip_completed"] = False
+            launch_options[upstream]["skip_completed"] = False
+        return launch_options
+
+    def launch(self) -> Dict[str, List[submitit.Job]]:
+        """Submits every stage, in the order they were added. Returns the jobs of each stage.
+
+        Nothing is submitted if the stages of an aftercorr dependency do not have as many tasks.
+        """
+        launch_options = self._launch_options()
+        self.pipeline_id = new_pipeline_id()
+        records: Dict[str, PipelineStage] = {}
+        jobs = {}
+        for name, stage in self.stages.items():
+            jobs[name], records[name] = launch_stage(
+                self.name,
+                self.pipeline_id,
+                name,
+                stage.experiment,
+                stage.slurm_params,
+                [records[upstream] for upstream in stage.after],
+                stage.dependency,
+                **launch_options[name],
+            )
+        return jobs
@@ -0,0 +1,128 @@
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence, Union
+
+from submititnow.jt.states import FAILURE_CLASSES
+
+_MEM_UNITS_MB = {"K": 1 / 1024, "M": 1, "G": 1024, "T": 1024 * 1024}
+_MEM_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*$", re.IGNORECASE)
+
+
+def parse_mem_mb(mem: Union[int, float, str]) -> float:
+    """Returns a SLURM memory requirement (e.g. `16G`, `500M`, or a number of MB) in MB."""
+    if isinstance(mem, (int, float)):
+        return float(mem)
+    match = _MEM_PATTERN.match(mem)
+    if match is None:
+        raise ValueError(f"Cannot parse the memory requirement {mem!r}")
+    value, unit = match.groups()
+    return float(value) * _MEM_UNITS_MB[unit.upper() or "M"]
+
+
+def format_mem(mem_mb: float) -> str:
+    mem_mb = math.ceil(mem_mb)
+    return f"{mem_mb // 1024}G" if mem_mb % 1024 == 0 else f"{mem_mb}M"
+
+
+def parse_time_min(time: Union[int, float, str]) -> float:
+    """Returns a SLURM time limit (minutes, `MM:SS`, `HH:MM:SS`, `D-HH[:MM[:SS]]`) in minutes."""
+    if isinstance(time, (int, float)):
+        return float(time)
+    days, _, clock = time.strip().rpartition("-")
+    parts = [float(part) for part in clock.split(":")]
+    if days:
+        # With days, the clock starts with hours.
+        hours, minutes, seconds = (parts + [0, 0])[:3]
+    elif len(parts) == 3:
+        hours, minutes, seconds = parts
+    else:
+        hours, (minutes, seconds) = 0, (parts + [0])[:2]
+    return float(days or 0) * 24 * 60 + hours * 60 + minutes + seconds / 60
+
+
+# Parameters escalated for each failure class, with their parser and formatter.
+_ESCALATED_PARAMS = {
+    "oom": {
+        "slurm_mem": (parse_mem_mb, format_mem),
+        "mem_gb": (float, math.ceil),
+        "slurm_mem_per_cpu": (parse_mem_mb, format_mem),
+        "slurm_mem_per_gpu": (parse_mem_mb, format_mem),
+    },
+    "timeout": {
+        "slurm_time": (parse_time_min, math.ceil),
+        "timeout_min": (float, math.ceil),
+    },
+}
+# The same parameters, passed through `slurm_additional_parameters`.
+_ESCALATED_ADDITIONAL_PARAMS = {
+    failure: {
+        key[len("slurm_") :]: value for key, value in params.items() if key.startswith("slurm_")
+    }
+    for failure, params in _ESCALATED_PARAMS.items()
+}
+# Parameter an escalation starts from when none is requested, with the value submitit
+# then uses. The default memory is the partition's, unknown to submitit.
+_ESCALATION_DEFAULTS = {"timeout": ("timeout_min", 5)}
+
+
+@dataclass
+class RetryPolicy:
+    """When and how `Experiment.launch` resubmits the jobs that failed.
+
+    Args:
+        max_attempts: Max number of times a job is submitted, the first one included.
+        mem_multiplier: Factor applied to the memory (`slurm_mem`, `mem_gb`, ...) of the
+            jobs resubmitted after running out of memory. Jobs that requested no memory
+            are not resubmitted, as the partition's default memory is unknown.
+        time_multiplier: Factor applied to the time limit (`slurm_time` or
+            `timeout_min`, submitit's default if neither is requested) of the jobs
+            resubmitted after reaching it.
+        retry_on: Failure classes that are resubmitted, among `FAILURE_CLASSES`.
+    """
+
+    max_attempts: int = 3
+    mem_multiplier: float = 2.0
+    time_multiplier: float = 2.0
+    retry_on: Sequence[str] = ("oom", "timeout")
+
+    def __post_init__(self):
+        unknown = set(self.retry_on) - set(FAILURE_CLASSES)
+        if unknown:
+            raise ValueError(
+                f"Unknown failure classes {sorted(unknown)}, valid ones are {list(FAILURE_CLASSES)}"
+            )
+        if self.max_attempts < 1:
+            raise ValueError(f"max_attempts must be at least 1, got {self.max_attempts}")
+
+    def should_retry(self, failure: str, attempt: int) -> bool:
+        return failure in self.retry_on and attempt < self.max_attempts
+
+    def escalate(self, slurm_params: Dict[str, Any], failure: str) -> Optional[Dict[str, Any]]:
+        """Returns the SLURM parameters of the next attempt of a job that failed with `failure`.
+
+        Returns None if the failure calls for more resources but none can be escalated,
+        i.e. the next attempt would fail the same way.
+        """
+        if failure not in _ESCALATED_PARAMS:
+            return dict(slurm_params)
+        multiplier = {"oom": self.mem_multiplier, "timeout": self.time_multiplier}[failure]
+        params = dict(slurm_params)
+        additional = dict(params.get("slurm_additional_parameters") or {})
+        escalated = False
+        for values, escalated_params in (
+            (params, _ESCALATED_PARAMS[failure]),
+            (additional, _ESCALATED_ADDITIONAL_PARAMS[failure]),
+        ):
+            for key, (parse, format_value) in escalated_params.items():
+                if values.get(key) is not None:
+                    values[key] = format_value(parse(values[key]) * multiplier)
+                    escalated = True
+        if additional:
+            params["slurm_additional_parameters"] = additional
+        if not escalated:
+            if failure not in _ESCALATION_DEFAULTS:
+                return None
+            key, default = _ESCALATION_DEFAULTS[failure]
+            params[key] = math.ceil(default * multiplier)
+        return params
@@ -0,0 +1,234 @@
+import argparse
+import json
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from submititnow.jt.results import JobParamsStore
+from submititnow.jt.scheduler import SlurmBackend
+from submititnow.jt.states import JobStateStore
+from submititnow.jt.utils import JTExp
+from submititnow.retry import format_mem, parse_mem_mb, parse_time_min
+
+RIGHT_SIZE_MODES = ("suggest", "fill", "tighten")
+
+USAGE_SOURCES = ("timings", "sacct")
+
+
+class JobUsage(NamedTuple):
+    """Peak memory (in MB) and elapsed time (in minutes) of a job that completed."""
+
+    job_id: str
+    peak_rss_mb: Optional[float]
+    elapsed_min: Optional[float]
+
+
+def _completed_job_ids(exp: JTExp) -> List[str]:
+    # Packed points share the resources of their task, only whole tasks are sized from.
+    tracker = exp.tracker
+    job_ids = [row.job_id for row in tracker.load() if ":" not in row.job_id]
+    tracker.close()
+    state_store = JobStateStore(exp.db_file)
+    states = state_store.load_terminal_states(job_ids)
+    state_store.close()
+    return [job_id for job_id in job_ids if states.get(job_id) == "COMPLETED"]
+
+
+def usage_from_timings(exp: JTExp) -> List[JobUsage]:
+    """Returns the usage of the completed jobs of an experiment from the timings recorded by `jt`."""
+    job_ids = _completed_job_ids(exp)
+    tracker = exp.tracker
+    timings = tracker.load_timings(job_ids)
+    tracker.close()
+    usages = []
+    for job_id, timing in timings.items():
+        started = timing.started_at if timing.started_at is not None else timing.user_started_at
+        elapsed = None
+        if started is not None and timing.ended_at is not None:
+            elapsed = max(0.0, timing.ended_at - started) / 60
+        usages.append(JobUsage(job_id, timing.peak_rss_mb, elapsed))
+    return usages
+
+
+def usage_from_sacct(exp: JTExp, backend: Optional[SlurmBackend] = None) -> List[JobUsage]:
+    """Returns the usage of the completed jobs of an experiment from the SLURM accounting.
+
+    The elapsed time is the one of the allocation, the peak memory the largest `MaxRSS`
+    of its steps.
+    """
+    job_ids = set(_completed_job_ids(exp))
+    array_ids = sorted({job_id.split("_")[0] for job_id in job_ids})
+    rows = (backend or SlurmBackend()).sacct_usage(array_ids)
+    elapsed, peak_rss = {}, {}
+    for row in rows:
+        job_id, _, step = row["JobID"].partition(".")
+        if job_id not in job_ids:
+            continue
+        try:
+            if not step and row["Elapsed"]:
+                elapsed[job_id] = parse_time_min(row["Elapsed"])
+            if row["MaxRSS"]:
+                peak_rss[job_id] = max(peak_rss.get(job_id, 0.0), parse_mem_mb(row["MaxRSS"]))
+        except ValueError:
+            continue
+    return [
+        JobUsage(job_id, peak_rss.get(job_id), elapsed.get(job_id))
+        for job_id in sorted(elapsed.keys() | peak_rss.keys())
+    ]
+
+
+def _param_items(params: Dict[str, Any]) -> List[Tuple[str, str]]:
+    # Values are compared by their JSON, as recorded by `JobParamsStore`.
+    return [(key, json.dumps(value, default=repr)) for key, value in params.items()]
+
+
+def _gb_to_mb(mem_gb) -> float:
+    return float(mem_gb) * 1024
+
+
+def _mb_to_gb(mem_mb: float) -> int:
+    return math.ceil(mem_mb / 1024)
+
+
+def _max(values: Iterable[Optional[float]]) -> Optional[float]:
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+class ResourceRecommender:
+    """Recommends the memory and time of jobs from the usage of the past jobs of an experiment.
+
+    A job is sized from the past jobs with the same parameters. Without any, each of its
+    parameter values bounds its usage by the largest one among the past jobs sharing it,
+    and the tightest of these bounds is kept. Jobs with no value in common with past jobs
+    are sized from the whole experiment.
+    """
+
+    def __init__(self, usages: Iterable[JobUsage], job_params: Dict[str, Dict[str, Any]]):
+        self.by_params: Dict[Tuple, List[JobUsage]] = {}
+        self.by_value: Dict[Tuple[str, str], List[JobUsage]] = {}
+        self.usages = list(usages)
+        for usage in self.usages:
+            items = _param_items(job_params.get(usage.job_id, {}))
+            self.by_params.setdefault(tuple(sorted(items)), []).append(usage)
+            for item in items:
+                self.by_value.setdefault(item, []).append(usage)
+
+    @classmethod
+    def from_history(
+        cls, exp: JTExp, source: str = "timings", backend: Optional[SlurmBackend] = None
+    ) -> "ResourceRecommender":
+        if source not in USAGE_SOURCES:
+            raise ValueError(f"source must be one of {USAGE_SOURCES}, got {source}")
+        usages = usage_from_timings(exp) if source == "timings" else usage_from_sacct(exp, backend)
+        params_store = JobParamsStore(exp.db_file)
+        job_params = params_store.load(usage.job_id for usage in usages)
+        params_store.close()
+        return cls(usages, job_params)
+
+    def _job_usage(self, items: List[Tuple[str, str]], field: str) -> Optional[float]:
+        matches = self.by_params.get(tuple(sorted(items)))
+        if matches:
+            return _max(getattr(usage, field) for usage in matches)
+        bounds = [
+            _max(getattr(usage, field) for usage in self.by_value[item])
+            for item in items
+            if item in self.by_value
+        ]
+        bounds = [bound for bound in bounds if bound is not None]
+        if bounds:
+            return min(bounds)
+        return _max(getattr(usage, field) for usage in self.usages)
+
+    def recommend(
+        self, job_params: Iterable[argparse.Namespace]
+    ) -> Tuple[Optional[float], Optional[float]]:
+        """Returns the expected peak memory (MB) and elapsed time (minutes) of the most demanding job."""
+        peak_rss, elapsed = None, None
+        if not self.usages:
+            return peak_rss, elapsed
+        # Jobs with the same parameter values share their recommendation.
+        seen = set()
+        for job_param in job_params:
+            items = _param_items(vars(job_param))
+            key = tuple(sorted(items))
+            if key in seen:
+                continue
+            seen.add(key)
+            peak_rss = _max([peak_rss, self._job_usage(items, "peak_rss_mb")])
+            elapsed = _max([elapsed, self._job_usage(items, "elapsed_min")])
+        return peak_rss, elapsed
+
+
+# Memory (MB) and time (minutes) parameters with their parser and formatter, the generic
+# submitit ones being filled when neither is requested.
+_SIZED_PARAMS = {
+    "mem": (("slurm_mem", parse_mem_mb, format_mem), ("mem_gb", _gb_to_mb, _mb_to_gb)),
+    "time": (("slurm_time", parse_time_min, math.ceil), ("timeout_min", float, math.ceil)),
+}
+
+
+@dataclass
+class RightSizing:
+    """How `Experiment.launch` sizes the memory and time of jobs from the usage of past jobs.
+
+    Args:
+        mode: `suggest` only reports the recommended resources, `fill` sets the ones that
+            are not requested, and `tighten` also lowers the ones requested above them.
+        source: Where the usage of past jobs is read: the `timings` logged by the jobs, or
+            the SLURM accounting (`sacct`).
+        margin: Factor applied to the largest usage of past jobs.
+        min_mem_mb: Lower bound of the recommended memory, in MB.
+        min_time_min: Lower bound of the recommended time limit, in minutes.
+    """
+
+    mode: str = "suggest"
+    source: str = "timings"
+    margin: float = 1.3
+    min_mem_mb: float = 1024
+    min_time_min: float = 10
+
+    def __post_init__(self):
+        if self.mode not in RIGHT_SIZE_MODES:
+            raise ValueError(f"mode must be one of {RIGHT_SIZE_MODES}, got {self.mode}")
+        if self.source not in USAGE_SOURCES:
+            raise ValueError(f"source must be one of {USAGE_SOURCES}, got {self.source}")
+        if self.margin < 1:
+            raise ValueError(f"margin must be at least 1, got {self.margin}")
+
+    def _recommended(self, peak_rss_mb, elapsed_min) -> Dict[str, Optional[float]]:
+        return {
+            "mem": None
+            if peak_rss_mb is None
+            else max(self.min_mem_mb, math.ceil(peak_rss_mb * self.margin / 1024) * 1024),
+            "time": None
+            if elapsed_min is None
+            else max(self.min_time_min, math.ceil(elapsed_min * self.margin)),
+        }
+
+    def apply(
+        self,
+        slurm_params: Dict[str, Any],
+        peak_rss_mb: Optional[float],
+        elapsed_min: Optional[float],
+    ) -> Tuple[Dict[str, Any], Dict[str, Tuple[Any, Any]]]:
+        """Returns the SLURM parameters sized per `mode`, and the `(requested, recommended)` of each resource."""
+        params = dict(slurm_params)
+        suggestions = {}
+        for resource, recommended in self._recommended(peak_rss_mb, elapsed_min).items():
+            if recommended is None:
+                continue
+            specific, generic = _SIZED_PARAMS[resource]
+            key, parse, format_value = next(
+                (param for param in (specific, generic) if params.get(param[0]) is not None),
+                generic,
+            )
+            requested = params.get(key)
+            value = format_value(recommended)
+            suggestions[key] = (requested, value)
+            if requested is None:
+                if self.mode != "suggest":
+                    params[key] = value
+            elif self.mode == "tighten" and parse(requested) > recommended:
+                params[key] = value
+        return params, suggestions
@@ -0,0 +1,376 @@
+import abc
+import argparse
+import functools
+import json
+import math
+import random
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Union
+
+from submititnow import cli
+from submititnow.experiment_lib import Experiment
+from submititnow.jt.engine import MIN_POLL_INTERVAL
+
+SEARCH_MODES = ("min", "max")
+
+# A search space maps each parameter to its values, or to a sampler `rng -> value`.
+SearchSpace = Mapping[str, Union[Sequence, Callable[[random.Random], Any]]]
+
+
+class Trial(NamedTuple):
+    """A configuration that ran, and its metric (None if its job failed)."""
+
+    config: Dict[str, Any]
+    metric: Optional[float]
+
+
+def _config_key(config: Mapping[str, Any]) -> str:
+    return json.dumps(dict(config), sort_keys=True, default=repr)
+
+
+def _validate_space(space: SearchSpace):
+    empty = [key for key, values in space.items() if not callable(values) and not len(values)]
+    if empty:
+        raise ValueError(f"The search space has no values for {empty}")
+
+
+def sample_config(space: SearchSpace, rng: random.Random) -> Dict[str, Any]:
+    return {
+        key: values(rng) if callable(values) else rng.choice(list(values))
+        for key, values in space.items()
+    }
+
+
+class Searcher(abc.ABC):
+    """Ask/tell interface of the sweep strategies run by `run_search`.
+
+    `ask` returns the configurations of the next round of jobs, and an empty list once the
+    search is over. Each of them is then `tell`-ed its metric, before the next `ask`.
+    Subclasses implement `ask`, and may wrap any optimizer this way.
+    """
+
+    def __init__(self, mode: str = "min"):
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"mode must be one of {SEARCH_MODES}, got {mode}")
+        self.mode = mode
+        self.trials: List[Trial] = []
+
+    @abc.abstractmethod
+    def ask(self) -> List[Dict[str, Any]]:
+        """Returns the configurations of the next round, an empty list once the search is over."""
+
+    def tell(self, config: Dict[str, Any], metric: Optional[float]):
+        self.trials.append(Trial(config, metric))
+
+    def sort_key(self, metric: Optional[float]) -> float:
+        """Orders metrics from the best to the worst, failed trials last."""
+        if metric is None or math.isnan(metric):
+            return math.inf
+        return metric if self.mode == "min" else -metric
+
+    def reaches(self, metric: Optional[float], target: float) -> bool:
+        return self.sort_key(metric) <= self.sort_key(target)
+
+    @property
+    def best(self) -> Optional[Trial]:
+        trials = [trial for trial in self.trials if trial.metric is not None]
+        return min(trials, key=lambda trial: self.sort_key(trial.metric), default=None)
+
+
+class GridSearch(Searcher):
+    """Runs every configuration of the Cartesian product of the space, in a single round."""
+
+    def __init__(self, space: Mapping[str, Sequence], mode: str = "min"):
+        super().__init__(mode)
+        _validate_space(space)
+        self.space = space
+        self._done = False
+
+    def ask(self) -> List[Dict[str, Any]]:
+        if self._done:
+            return []
+        self._done = True
+        keys = list(self.space)
+        configs = [{}]
+        for key in keys:
+            configs = [{**config, key: value} for config in configs for value in self.space[key]]
+        return configs
+
+
+class RandomSearch(Searcher):
+    """Samples `budget` configurations of the space, `round_size` at a time (all at once by default).
+
+    Configurations are never repeated: the search ends early once every configuration of
+    the space was sampled, or once a sampler keeps returning values already sampled.
+    """
+
+    def __init__(
+        self,
+        space: SearchSpace,
+        budget: int,
+        round_size: Optional[int] = None,
+        mode: str = "min",
+        seed: Optional[int] = None,
+    ):
+        super().__init__(mode)
+        if budget < 1:
+            raise ValueError(f"budget must be at least 1, got {budget}")
+        _validate_space(space)
+        self.space = space
+        self.budget = budget
+        self.round_size = round_size or budget
+        self.rng = random.Random(seed)
+        self._sampled = set()
+
+    def _num_configs(self) -> float:
+        if any(callable(values) for values in self.space.values()):
+            return math.inf
+        # Repeated values are the same configurations.
+        return math.prod(
+            len({_config_key({"value": value}) for value in values})
+            for values in self.space.values()
+        )
+
+    def ask(self) -> List[Dict[str, Any]]:
+        num_configs = min(self.budget, self._num_configs())
+        configs = []
+        # A sampler may keep returning the same values: give up on a round after many repeats.
+        for _ in range(self.round_size * 100):
+            if len(self._sampled) >= num_configs or len(configs) >= self.round_size:
+                break
+            config = sample_config(self.space, self.rng)
+            if _config_key(config) not in self._sampled:
+                self._sampled.add(_config_key(config))
+                configs.append(config)
+        return configs
+
+
+class SuccessiveHalving(Searcher):
+    """Runs `num_configs` sampled configurations with `min_resource`, then the best `1 / eta`
+    of them with `eta` times more resource, and so on up to `max_resource`.
+
+    The resource (e.g. a number of epochs) is passed to the jobs as the `resource_key`
+    parameter. The configurations that are not promoted are never run again.
+    """
+
+    def __init__(
+        self,
+        space: SearchSpace,
+        num_configs: int,
+        max_resource: float,
+        min_resource: float = 1,
+        eta: int = 3,
+        resource_key: str = "epochs",
+        mode: str = "min",
+        seed: Optional[int] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        super().__init__(mode)
+        _validate_space(space)
+        if eta < 2:
+            raise ValueError(f"eta must be at least 2, got {eta}")
+        if not 0 < min_resource <= max_resource:
+            raise ValueError(
+                f"Expected 0 < min_resource <= max_resource, got {min_resource} and {max_resource}"
+            )
+        self.eta = eta
+        self.max_resource = max_resource
+        self.resource_key = resource_key
+        rng = rng or random.Random(seed)
+        self._rung: List[Dict[str, Any]] = []
+        configs, keys = [], set()
+        # Only distinct configurations are raced against each other.
+        for _ in range(num_configs * 10):
+            if len(configs) == num_configs:
+                break
+            config = sample_config(space, rng)
+            if _config_key(config) not in keys:
+                keys.add(_config_key(config))
+                configs.append(config)
+        self._next_rung = configs
+        self._resource = min_resource
+        self._results: Dict[str, Optional[float]] = {}
+
+    def _with_resource(self, config: Dict[str, Any], resource: float) -> Dict[str, Any]:
+        resource = int(resource) if float(resource).is_integer() else resource
+        return {**config, self.resource_key: resource}
+
+    def ask(self) -> List[Dict[str, Any]]:
+        if self._rung:
+            # Promote the best configurations of the rung that just ran.
+            if self._resource >= self.max_resource:
+                return []
+            ranked = sorted(
+                self._rung, key=lambda config: self.sort_key(self._results.get(_config_key(config)))
+            )
+            ranked = [config for config in ranked if self._results.get(_config_key(config)) is not None]
+            self._next_rung = ranked[: max(1, len(self._rung) // self.eta)]
+            self._resource = min(self._resource * self.eta, self.max_resource)
+        self._rung, self._next_rung = self._next_rung, []
+        self._results = {}
+        return [self._with_resource(config, self._resource) for config in self._rung]
+
+    def tell(self, config: Dict[str, Any], metric: Optional[float]):
+        super().tell(config, metric)
+        config = {key: value for key, value in config.items() if key != self.resource_key}
+        self._results[_config_key(config)] = metric
+
+    @property
+    def best(self) -> Optional[Trial]:
+        # Metrics are only comparable with the same resource: keep the highest one reached.
+        trials = [trial for trial in self.trials if trial.metric is not None]
+        if not trials:
+            return None
+        resource = max(trial.config[self.resource_key] for trial in trials)
+        return min(
+            (trial for trial in trials if trial.config[self.resource_key] == resource),
+            key=lambda trial: self.sort_key(trial.metric),
+        )
+
+
+class Hyperband(Searcher):
+    """Runs brackets of `SuccessiveHalving`, from many configurations with a small resource to
+    a few configurations with `max_resource`, hedging against early metrics being misleading.
+    """
+
+    def __init__(
+        self,
+        space: SearchSpace,
+        max_resource: float,
+        min_resource: float = 1,
+        eta: int = 3,
+        resource_key: str = "epochs",
+        mode: str = "min",
+        seed: Optional[int] = None,
+    ):
+        super().__init__(mode)
+        rng = random.Random(seed)
+        s_max = int(math.log(max_resource / min_resource, eta) + 1e-9)
+        self.brackets = [
+            SuccessiveHalving(
+                space,
+                num_configs=math.ceil((s_max + 1) / (s + 1) * eta**s),
+                max_resource=max_resource,
+                min_resource=max_resource / eta**s,
+                eta=eta,
+                resource_key=resource_key,
+                mode=mode,
+                rng=rng,
+            )
+            for s in range(s_max, -1, -1)
+        ]
+        self._bracket = 0
+
+    def ask(self) -> List[Dict[str, Any]]:
+        while self._bracket < len(self.brackets):
+            configs = self.brackets[self._bracket].ask()
+            if configs:
+                return configs
+            self._bracket += 1
+        return []
+
+    def tell(self, config: Dict[str, Any], metric: Optional[float]):
+        super().tell(config, metric)
+        self.brackets[self._bracket].tell(config, metric)
+
+    @property
+    def best(self) -> Optional[Trial]:
+        bests = [bracket.best for bracket in self.brackets if bracket.best is not None]
+        return min(bests, key=lambda trial: self.sort_key(trial.metric), default=None)
+
+
+def extract_metric(result: Any, metric: Optional[str] = None) -> Optional[float]:
+    """Returns the metric of a job result: the result itself, or its `metric` key or attribute."""
+    if metric is not None:
+        result = result.get(metric) if isinstance(result, Mapping) else getattr(result, metric, None)
+    try:
+        return float(result)
+    except (TypeError, ValueError):
+        return None
+
+
+def _describe_config(keys: Sequence[str], job_param: argparse.Namespace) -> str:
+    return ", ".join(f"{key}={getattr(job_param, key)!r}" for key in keys) or "---"
+
+
+def run_search(
+    name: str,
+    job_func: Callable,
+    searcher: Searcher,
+    slurm_params: Dict[str, Any],
+    base_params: Optional[Mapping[str, Any]] = None,
+    metric: Optional[str] = None,
+    target: Optional[float] = None,
+    job_desc_function: Optional[Callable] = None,
+    submititnow_dir: Optional[str] = None,
+    code_version: Optional[str] = None,
+    profile_handlers: Optional[Mapping[str, Callable]] = None,
+    verbose: bool = True,
+    poll_interval: float = MIN_POLL_INTERVAL,
+    **launch_options,
+) -> Searcher:
+    """Runs the rounds of jobs asked by `searcher` as launches of the experiment `name`.
+
+    Each job runs `job_func` with `base_params` updated with its configuration, and its
+    metric is read from its result (see `extract_metric`) as soon as it completes. Failed
+    jobs are told a None metric. Once a job reaches `target`, the jobs still running are
+    cancelled and the search stops. The `profile_handlers` are registered on the experiment
+    of each round, and the `launch_options` passed to its `Experiment.launch`.
+
+    Returns:
+        The `searcher`, holding the trials and the best one.
+    """
+    base_params = dict(base_params or {})
+    round_index = 0
+    while True:
+        configs = searcher.ask()
+        if not configs:
+            break
+        round_index += 1
+        keys = list(configs[0])
+        experiment = Experiment(
+            name,
+            job_func=job_func,
+            job_params=[argparse.Namespace(**{**base_params, **config}) for config in configs],
+            job_desc_function=job_desc_function or functools.partial(_describe_config, keys),
+            submititnow_dir=submititnow_dir,
+            code_version=code_version,
+        )
+        for profile, handler in (profile_handlers or {}).items():
+            experiment.register_profile_handler(profile, handler)
+        experiment.launch(dict(slurm_params), verbose=verbose, **launch_options)
+
+        pending = {_config_key(config): config for config in configs}
+        reached_target = False
+        results = experiment.iter_results(poll_interval=poll_interval)
+        try:
+            for job_param, result in results:
+                key = _config_key({key: getattr(job_param, key) for key in keys})
+                config = pending.pop(key, None)
+                if config is None:
+                    continue
+                value = extract_metric(result, metric)
+                searcher.tell(config, value)
+                if target is not None and searcher.reaches(value, target):
+                    reached_target = True
+                    break
+        finally:
+            results.close()
+        if reached_target:
+            cancelled = _cancel_running(experiment)
+            if verbose:
+                cli._display_search_round(round_index, len(configs), searcher.best, cancelled)
+            break
+        for config in pending.values():
+            searcher.tell(config, None)
+        if verbose:
+            cli._display_search_round(round_index, len(configs), searcher.best)
+    return searcher
+
+
+def _cancel_running(experiment: Experiment) -> int:
+    # Points packed in a task share its job.
+    jobs = {job.job_id: job for job in experiment.jobs.values()}
+    running = [job for job in jobs.values() if not job.done()]
+    for job in running:
+        job.cancel(check=False)
+    return len(running)
@@ -0,0 +1,64 @@
+import argparse
+import itertools
+import math
+from typing import Any, Dict, Iterator, Mapping, Sequence, Set
+
+
+class Sweep(Sequence):
+    """Lazy Cartesian product of parameter values, as a sequence of `argparse.Namespace`.
+
+    Jobs are generated on demand, in the same order as `itertools.product` (the last
+    swept parameter varies the fastest), so that very large grids never need to be
+    held in memory. Any job can also be generated directly from its index.
+
+    Args:
+        base_params: Parameters shared by all the jobs.
+        sweep_params: Values to sweep over, for each swept parameter. They override
+            the values in `base_params`.
+    """
+
+    def __init__(
+        self, base_params: Mapping[str, Any], sweep_params: Mapping[str, Sequence]
+    ):
+        self.base_params = dict(base_params)
+        self.sweep_params = {k: list(v) for k, v in sweep_params.items()}
+
+    def __len__(self):
+        return math.prod(len(values) for values in self.sweep_params.values())
+
+    def _make_params(self, bundle: Dict[str, Any]) -> argparse.Namespace:
+        params = dict(self.base_params)
+        params.update(bundle)
+        return argparse.Namespace(**params)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Sweep index out of range")
+
+        bundle = {}
+        for key, values in reversed(self.sweep_params.items()):
+            index, value_index = divmod(index, len(values))
+            bundle[key] = values[value_index]
+        return self._make_params(bundle)
+
+    def __iter__(self) -> Iterator[argparse.Namespace]:
+        keys = list(self.sweep_params)
+        for bundle in itertools.product(*self.sweep_params.values()):
+            yield self._make_params(dict(zip(keys, bundle)))
+
+    @property
+    def varying_keys(self) -> Set[str]:
+        return {k for k, values in self.sweep_params.items() if len(values) > 1}
+
+    @property
+    def common_params(self) -> Dict[str, Any]:
+        """Parameters that have the same value in all the jobs."""
+        params = {k: v for k, v in self.base_params.items() if k not in self.varying_keys}
+        for k, values in self.sweep_params.items():
+            if len(values) == 1:
+                params[k] = values[0]
+        return params
@@ -0,0 +1,178 @@
+import ast
+import argparse
+import importlib
+import sys
+import types
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional, Set
+
+
+# Statements with nested statements, whose top-level names are bound by their body.
+_COMPOUND_STATEMENTS = tuple(
+    getattr(ast, name)
+    for name in ("If", "For", "AsyncFor", "While", "With", "AsyncWith", "Try", "TryStar")
+    if hasattr(ast, name)
+)
+
+
+def _target_names(target: ast.AST) -> Set[str]:
+    return {node.id for node in ast.walk(target) if isinstance(node, ast.Name)}
+
+
+def _is_main_guard(stmt: ast.stmt) -> bool:
+    """Returns whether a statement is an `if __name__ == "__main__":` block."""
+    test = getattr(stmt, "test", None)
+    return (
+        isinstance(stmt, ast.If)
+        and isinstance(test, ast.Compare)
+        and isinstance(test.left, ast.Name)
+        and test.left.id == "__name__"
+        and any(
+            isinstance(comparator, ast.Constant) and comparator.value == "__main__"
+            for comparator in test.comparators
+        )
+    )
+
+
+def _bound_names(stmt: ast.stmt) -> Set[str]:
+    """Returns the top-level names bound by a module-level statement."""
+    if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return {stmt.name}
+    if isinstance(stmt, (ast.Import, ast.ImportFrom)):
+        return {
+            alias.asname or alias.name.split(".")[0]
+            for alias in stmt.names
+            if alias.name != "*"
+        }
+    if isinstance(stmt, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+        targets = stmt.targets if isinstance(stmt, ast.Assign) else [stmt.target]
+        return {name for target in targets for name in _target_names(target)}
+    if isinstance(stmt, _COMPOUND_STATEMENTS) and not _is_main_guard(stmt):
+        names = set()
+        if isinstance(stmt, (ast.For, ast.AsyncFor)):
+            names |= _target_names(stmt.target)
+        for item in getattr(stmt, "items", ()):
+            if item.optional_vars is not None:
+                names |= _target_names(item.optional_vars)
+        for child in ast.iter_child_nodes(stmt):
+            if isinstance(child, ast.ExceptHandler):
+                if child.name:
+                    names.add(child.name)
+                names |= {name for nested in child.body for name in _bound_names(nested)}
+            elif isinstance(child, ast.stmt):
+                names |= _bound_names(child)
+        return names
+    return set()
+
+
+def _used_names(stmt: ast.stmt) -> Set[str]:
+    return {node.id for node in ast.walk(stmt) if isinstance(node, ast.Name)}
+
+
+def _may_mutate(stmt: ast.stmt) -> bool:
+    """Returns whether a statement may change the objects it uses, e.g. `PARSER.add_argument(...)`."""
+    return isinstance(stmt, (ast.Expr,) + _COMPOUND_STATEMENTS) and not _is_main_guard(stmt)
+
+
+def _required_statements(tree: ast.Module, names: Iterable[str]) -> List[ast.stmt]:
+    """Returns the module-level statements needed to define `names`, in their source order.
+
+    These are the statements binding a required name, including in the body of compound
+    statements (`try`, `if`, ...), and the statements that may change the objects of a
+    required name, e.g. `PARSER.add_argument(...)`. Any other statement, e.g. the heavy
+    imports only used by `main`, is left out, as is the `if __name__ == "__main__":` block.
+    """
+    future_imports = [
+        stmt
+        for stmt in tree.body
+        if isinstance(stmt, ast.ImportFrom) and stmt.module == "__future__"
+    ]
+    statements = [stmt for stmt in tree.body if stmt not in future_imports]
+    required, kept = set(names), set()
+    changed = True
+    while changed:
+        changed = False
+        for position, stmt in enumerate(statements):
+            if position in kept:
+                continue
+            if _bound_names(stmt) & required or (
+                _may_mutate(stmt) and _used_names(stmt) & required
+            ):
+                kept.add(position)
+                required |= _used_names(stmt)
+                changed = True
+    return future_imports + [
+        stmt for position, stmt in enumerate(statements) if position in kept
+    ]
+
+
+def defines(src_file: str, name: str) -> bool:
+    """Returns whether the Python script `src_file` defines `name` at the top level."""
+    tree = ast.parse(Path(src_file).read_text(), filename=src_file)
+    return any(name in _bound_names(stmt) for stmt in tree.body)
+
+
+def load_add_arguments(module_name: str, src_file: str) -> Optional[Callable]:
+    """Returns the `add_arguments` function of a script without importing the whole module.
+
+    Only the statements `add_arguments` depends on are executed. Returns None if the
+    script does not define it, or if it cannot be loaded on its own: the caller should
+    import the module then, as well as if calling the returned function fails.
+    """
+    tree = ast.parse(Path(src_file).read_text(), filename=src_file)
+    statements = _required_statements(tree, ["add_arguments"])
+    if not any("add_arguments" in _bound_names(stmt) for stmt in statements):
+        return None
+
+    module = types.ModuleType(module_name)
+    module.__file__ = str(src_file)
+    code = compile(ast.Module(body=statements, type_ignores=[]), src_file, "exec")
+    try:
+        exec(code, module.__dict__)
+    except Exception:
+        return None
+    return module.add_arguments
+
+
+class ModuleFunction:
+    """Picklable reference to a function of a module, only imported when called.
+
+    The module is imported on the compute node instead of the launching process.
+    `sys_path` entries are added to the import path first, e.g. the launch directory.
+    """
+
+    def __init__(
+        self, module_name: str, func_name: str = "main", sys_path: Iterable[str] = ()
+    ):
+        self.module_name = module_name
+        self.func_name = func_name
+        self.sys_path = list(sys_path)
+        # Jobs are described and hashed by these names, same as the function itself.
+        self.__module__ = module_name
+        self.__qualname__ = func_name
+
+    def load(self) -> Callable:
+        for path in reversed(self.sys_path):
+            if path not in sys.path:
+                sys.path.insert(0, path)
+        module = importlib.import_module(self.module_name)
+        return getattr(module, self.func_name)
+
+    def source_file(self) -> Optional[str]:
+        """Returns the path of the module's source file, found without importing it."""
+        parts = self.module_name.split(".")
+        for path in [*self.sys_path, *sys.path]:
+            candidates = (
+                Path(path, *parts[:-1], f"{parts[-1]}.py"),
+                Path(path, *parts, "__init__.py"),
+            )
+            for candidate in candidates:
+                if candidate.is_file():
+                    return str(candidate)
+        return None
+
+    def __call__(self, job_param: argparse.Namespace) -> Any:
+        return self.load()(job_param)
+
+    def __repr__(self):
+        return f"ModuleFunction<{self.module_name}:{self.func_name}>"
@@ -0,0 +1,62 @@
+import json
+import os
+import resource
+import sys
+import time
+from typing import Any, Callable, Dict, Optional
+
+from submititnow.jt.logs import timing_log_prefix
+
+
+def process_start_time() -> Optional[float]:
+    """Returns the epoch time at which the current process started, or None if unknown (Linux only)."""
+    try:
+        with open("/proc/self/stat") as fp:
+            stat = fp.read()
+        with open("/proc/stat") as fp:
+            boot_time = next(float(line.split()[1]) for line in fp if line.startswith("btime"))
+    except (OSError, StopIteration, ValueError):
+        return None
+    # The command name (2nd field) may contain spaces: count the fields after it.
+    start_ticks = int(stat.rsplit(")", 1)[1].split()[19])
+    return boot_time + start_ticks / os.sysconf("SC_CLK_TCK")
+
+
+def resource_usage(children: bool = True) -> Dict[str, float]:
+    """Returns the peak RSS (in MB) and the CPU time (in seconds) of this process and its children."""
+    usages = [resource.getrusage(resource.RUSAGE_SELF)]
+    if children:
+        usages.append(resource.getrusage(resource.RUSAGE_CHILDREN))
+    # ru_maxrss is in kilobytes, except on macOS where it is in bytes.
+    rss_unit = 1 << 20 if sys.platform == "darwin" else 1 << 10
+    return {
+        "peak_rss_mb": round(max(usage.ru_maxrss for usage in usages) / rss_unit, 1),
+        "cpu_time_s": round(sum(usage.ru_utime + usage.ru_stime for usage in usages), 2),
+    }
+
+
+def print_timing(timing: Dict[str, Any], point=None):
+    # These lines are what `jt` reads to record the timings of each job (or packed point).
+    print(f"{timing_log_prefix(point)}{json.dumps(timing)}", flush=True)
+
+
+class TimedJob:
+    """Logs when a job's process started, when its user code started and ended, and its resource usage.
+
+    A first timing line is logged before calling the job function, so that the startup
+    time of jobs killed before the end (e.g. out of memory) is still known.
+    """
+
+    def __init__(self, job_func: Callable):
+        self.job_func = job_func
+        # Keep the function names, `Experiment` describes jobs by them.
+        self.__module__ = job_func.__module__
+        self.__qualname__ = job_func.__qualname__
+
+    def __call__(self, *args, **kwargs):
+        timing = {"started_at": process_start_time(), "user_started_at": time.time()}
+        print_timing(timing)
+        try:
+            return self.job_func(*args, **kwargs)
+        finally:
+            print_timing({**timing, "ended_at": time.time(), **resource_usage()})
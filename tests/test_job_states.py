@@ -0,0 +1,44 @@
+from submititnow.jt.logs import LogTailCache
+from submititnow.jt.scheduler import SchedulerSnapshot
+from submititnow.jt.states import is_terminal_state
+from submititnow.jt.utils import load_job_states
+
+
+def _submitted_only(tmp_path):
+    """Filepaths of a job whose script was written but whose task never logged anything."""
+    script = tmp_path / "123_submission.sh"
+    script.write_text("#!/bin/bash\n")
+    return {"sh": str(script)}
+
+
+def test_job_missing_from_the_queue_was_cancelled(tmp_path):
+    snapshot = SchedulerSnapshot({}, queued_array_ids=(), complete=True)
+
+    state = load_job_states("123_4", _submitted_only(tmp_path), snapshot, LogTailCache())
+
+    assert state == "CANCELLED (before starting execution)"
+
+
+def test_queued_job_is_pending(tmp_path):
+    snapshot = SchedulerSnapshot({}, queued_array_ids=("123",), complete=True)
+
+    state = load_job_states("123_4", _submitted_only(tmp_path), snapshot, LogTailCache())
+
+    assert state == "PENDING"
+
+
+def test_job_failing_before_starting(tmp_path):
+    snapshot = SchedulerSnapshot({"123_4": {"State": "NODE_FAIL"}}, complete=True)
+
+    state = load_job_states("123_4", _submitted_only(tmp_path), snapshot, LogTailCache())
+
+    assert state == "FAILED: NODE_FAIL (before starting execution)"
+
+
+def test_job_missing_from_an_incomplete_snapshot_is_not_terminal(tmp_path):
+    snapshot = SchedulerSnapshot({}, queued_array_ids=(), complete=False)
+
+    state = load_job_states("123_4", _submitted_only(tmp_path), snapshot, LogTailCache())
+
+    assert state == "UNKNOWN"
+    assert not is_terminal_state(state)
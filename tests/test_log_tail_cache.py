@@ -0,0 +1,46 @@
+import sqlite3
+
+from submititnow.jt.logs import LogTailCache
+
+
+def _persisted(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT path, marker, line FROM log_tails ORDER BY path").fetchall()
+    finally:
+        conn.close()
+
+
+def test_entries_are_persisted_on_flush(tmp_path):
+    db_path = tmp_path / "jt.db"
+    logs = [tmp_path / f"{i}_0_log.out" for i in range(3)]
+    for i, log in enumerate(logs):
+        log.write_text(f"submitit INFO (2024-01-01 10:00:00) - Job {i} completed\n")
+    cache = LogTailCache(db_path)
+
+    lines = [cache.last_line(str(log), "submitit") for log in logs]
+
+    assert _persisted(db_path) == []
+    cache.flush()
+    assert _persisted(db_path) == [
+        (str(log), "submitit", line) for log, line in zip(logs, lines)
+    ]
+    cache.close()
+
+    # A new cache reads the persisted entries instead of the unchanged logs.
+    cache = LogTailCache(db_path)
+    assert not any(cache.needs_read(str(log), "submitit") for log in logs)
+    assert [cache.last_line(str(log), "submitit") for log in logs] == lines
+    cache.close()
+
+
+def test_close_flushes_the_entries(tmp_path):
+    db_path = tmp_path / "jt.db"
+    log = tmp_path / "0_0_log.out"
+    log.write_text("submitit INFO (2024-01-01 10:00:00) - Job completed\n")
+    cache = LogTailCache(db_path)
+
+    line = cache.last_line(str(log), "submitit")
+    cache.close()
+
+    assert _persisted(db_path) == [(str(log), "submitit", line)]
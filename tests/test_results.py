@@ -0,0 +1,36 @@
+import argparse
+from pathlib import Path
+
+from submititnow.jt.results import job_hash
+
+
+def train(args):
+    return args
+
+
+class Model:
+    pass
+
+
+def _hash(**params):
+    return job_hash(train, argparse.Namespace(**params), "v1")
+
+
+def test_job_hash_is_stable_and_ignores_the_params_order():
+    assert _hash(lr=0.1, layers=[1, 2]) == _hash(layers=[1, 2], lr=0.1)
+    assert _hash(lr=0.1) != _hash(lr=0.2)
+    assert job_hash(train, argparse.Namespace(lr=0.1), "v2") != _hash(lr=0.1)
+
+
+def test_job_hash_encodes_common_non_json_values():
+    assert _hash(path=Path("/data"), tags={"b", "a"}) == _hash(
+        path=Path("/data"), tags={"a", "b"}
+    )
+    assert _hash(model=Model) == _hash(model=Model)
+    assert _hash(func=train) is not None
+
+
+def test_job_hash_refuses_values_without_a_stable_encoding():
+    assert _hash(model=Model()) is None
+    assert _hash(models=[Model()]) is None
+    assert _hash(callback=lambda: None) is None
@@ -0,0 +1,81 @@
+import pytest
+
+from submititnow.retry import RetryPolicy, format_mem, parse_mem_mb, parse_time_min
+
+
+@pytest.fixture
+def retry():
+    return RetryPolicy(mem_multiplier=2.0, time_multiplier=1.5)
+
+
+def test_escalate_oom_doubles_the_requested_memory(retry):
+    params = {"slurm_mem": "12G", "mem_gb": 12, "slurm_time": "01:00:00"}
+
+    assert retry.escalate(params, "oom") == {
+        "slurm_mem": "24G",
+        "mem_gb": 24,
+        "slurm_time": "01:00:00",
+    }
+    # The parameters of the failed attempt are left untouched.
+    assert params["slurm_mem"] == "12G"
+
+
+def test_escalate_timeout_extends_the_requested_time(retry):
+    params = {"slurm_time": "01:00:00", "timeout_min": 45, "mem_gb": 4}
+
+    assert retry.escalate(params, "timeout") == {
+        "slurm_time": 90,
+        "timeout_min": 68,
+        "mem_gb": 4,
+    }
+
+
+def test_escalate_additional_parameters(retry):
+    params = {"slurm_additional_parameters": {"mem": "500M", "time": "2-00:00:00", "qos": "hi"}}
+
+    assert retry.escalate(params, "oom") == {
+        "slurm_additional_parameters": {"mem": "1000M", "time": "2-00:00:00", "qos": "hi"}
+    }
+    assert retry.escalate(params, "timeout") == {
+        "slurm_additional_parameters": {"mem": "500M", "time": 4320, "qos": "hi"}
+    }
+
+
+def test_escalate_timeout_starts_from_the_default_time(retry):
+    assert retry.escalate({"mem_gb": 4}, "timeout") == {"mem_gb": 4, "timeout_min": 8}
+
+
+def test_escalate_oom_without_memory_cannot_escalate(retry):
+    assert retry.escalate({"timeout_min": 60}, "oom") is None
+    assert retry.escalate({"slurm_additional_parameters": {"qos": "hi"}}, "oom") is None
+
+
+def test_escalate_keeps_the_params_of_other_failures(retry):
+    params = {"mem_gb": 4}
+
+    assert retry.escalate(params, "node_fail") == params
+
+
+def test_should_retry():
+    retry = RetryPolicy(max_attempts=2, retry_on=("oom",))
+
+    assert retry.should_retry("oom", 1)
+    assert not retry.should_retry("oom", 2)
+    assert not retry.should_retry("timeout", 1)
+
+
+def test_invalid_retry_policy():
+    with pytest.raises(ValueError):
+        RetryPolicy(retry_on=("segfault",))
+    with pytest.raises(ValueError):
+        RetryPolicy(max_attempts=0)
+
+
+def test_parse_and_format_resources():
+    assert parse_mem_mb("2G") == 2048
+    assert parse_mem_mb("512") == 512
+    assert format_mem(2048) == "2G"
+    assert format_mem(1500.2) == "1501M"
+    assert parse_time_min("1-02:30") == 24 * 60 + 150
+    assert parse_time_min("10:30") == 10.5
+    assert parse_time_min("01:00:00") == 60
@@ -0,0 +1,157 @@
+from pathlib import Path
+
+import pytest
+
+from submititnow.jt.scheduler import SlurmBackend
+from submititnow.jt.states import JobStateStore
+from submititnow.jt.tracker import TrackerStore, make_tracker_row
+from submititnow.rightsize import JobUsage, RightSizing, usage_from_sacct
+
+
+class StubBackend(SlurmBackend):
+    """Returns canned `sacct` usage rows instead of querying SLURM."""
+
+    def __init__(self, rows):
+        super().__init__()
+        self.rows = rows
+        self.queried = []
+
+    def sacct_usage(self, array_ids):
+        self.queried.append(list(array_ids))
+        return self.rows
+
+
+class StubExp:
+    def __init__(self, db_file: Path):
+        self.db_file = db_file
+
+    @property
+    def tracker(self):
+        return TrackerStore(self.db_file)
+
+
+def _usage_row(job_id, elapsed="", max_rss="", state="COMPLETED"):
+    return {"JobID": job_id, "State": state, "Elapsed": elapsed, "MaxRSS": max_rss}
+
+
+@pytest.fixture
+def exp(tmp_path):
+    exp = StubExp(tmp_path / "jt.db")
+    statuses = {
+        "100_0": "COMPLETED",
+        "100_1": "COMPLETED",
+        "100_2": "FAILED: Out Of Memory",
+        "101_0:0": "COMPLETED",
+    }
+    tracker = exp.tracker
+    tracker.append(
+        make_tracker_row("2024-01-01 10:00:00", job_id, "", None, exp_id=100)
+        for job_id in [*statuses, "100_3"]
+    )
+    tracker.close()
+    state_store = JobStateStore(exp.db_file)
+    state_store.record(statuses)
+    state_store.close()
+    return exp
+
+
+def test_usage_from_sacct_reads_elapsed_from_allocation_and_max_rss_from_steps(exp):
+    backend = StubBackend(
+        [
+            _usage_row("100_0", elapsed="01:30:00"),
+            _usage_row("100_0.batch", elapsed="01:29:58", max_rss="2097152K"),
+            _usage_row("100_0.extern", elapsed="01:30:00", max_rss="1G"),
+            _usage_row("100_1", elapsed="1-00:00:00"),
+            _usage_row("100_1.batch", elapsed="23:59:59", max_rss="512M"),
+            _usage_row("100_2", elapsed="00:10:00", state="OUT_OF_MEMORY"),
+            _usage_row("100_2.batch", elapsed="00:10:00", max_rss="64G"),
+        ]
+    )
+
+    usages = usage_from_sacct(exp, backend)
+
+    assert backend.queried == [["100"]]
+    assert usages == [
+        JobUsage("100_0", 2048.0, 90.0),
+        JobUsage("100_1", 512.0, 1440.0),
+    ]
+
+
+def test_usage_from_sacct_skips_unparsable_values(exp):
+    backend = StubBackend(
+        [
+            _usage_row("100_0", elapsed="INVALID"),
+            _usage_row("100_0.batch", max_rss="300M"),
+            _usage_row("100_1", elapsed="00:05:00"),
+            _usage_row("100_1.batch", max_rss="n/a"),
+        ]
+    )
+
+    assert usage_from_sacct(exp, backend) == [
+        JobUsage("100_0", 300.0, None),
+        JobUsage("100_1", None, 5.0),
+    ]
+
+
+def test_usage_from_sacct_without_completed_jobs(tmp_path):
+    backend = StubBackend([_usage_row("100_0", elapsed="00:05:00")])
+
+    assert usage_from_sacct(StubExp(tmp_path / "jt.db"), backend) == []
+
+
+def test_apply_fills_the_generic_params_that_are_not_requested():
+    params, suggestions = RightSizing(mode="fill").apply({"nodes": 1}, 3000, 50)
+
+    # 3000 MB * 1.3 rounds up to 4 GB, 50 min * 1.3 to 65 min.
+    assert params == {"nodes": 1, "mem_gb": 4, "timeout_min": 65}
+    assert suggestions == {"mem_gb": (None, 4), "timeout_min": (None, 65)}
+
+
+def test_apply_fill_keeps_the_requested_params():
+    requested = {"slurm_mem": "16G", "timeout_min": 30}
+
+    params, suggestions = RightSizing(mode="fill").apply(requested, 3000, 50)
+
+    assert params == requested
+    assert suggestions == {"slurm_mem": ("16G", "4G"), "timeout_min": (30, 65)}
+
+
+def test_apply_tighten_only_lowers_the_params_requested_above_the_recommendation():
+    requested = {"slurm_mem": "16G", "timeout_min": 30}
+
+    params, _ = RightSizing(mode="tighten").apply(requested, 3000, 50)
+
+    assert params == {"slurm_mem": "4G", "timeout_min": 30}
+
+
+def test_apply_tighten_fills_the_params_that_are_not_requested():
+    params, _ = RightSizing(mode="tighten").apply({"slurm_time": "02:00:00"}, 3000, 50)
+
+    assert params == {"slurm_time": 65, "mem_gb": 4}
+
+
+def test_apply_suggest_keeps_the_params():
+    params, suggestions = RightSizing(mode="suggest").apply({"mem_gb": 32}, 3000, 50)
+
+    assert params == {"mem_gb": 32}
+    assert suggestions == {"mem_gb": (32, 4), "timeout_min": (None, 65)}
+
+
+def test_apply_bounds_the_recommendation_from_below():
+    params, _ = RightSizing(mode="fill").apply({}, 10, 1)
+
+    assert params == {"mem_gb": 1, "timeout_min": 10}
+
+
+def test_apply_without_usage_changes_nothing():
+    params, suggestions = RightSizing(mode="tighten").apply({"mem_gb": 32}, None, None)
+
+    assert params == {"mem_gb": 32}
+    assert suggestions == {}
+
+
+def test_invalid_right_sizing():
+    with pytest.raises(ValueError):
+        RightSizing(mode="shrink")
+    with pytest.raises(ValueError):
+        RightSizing(margin=0.5)
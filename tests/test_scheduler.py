@@ -0,0 +1,146 @@
+import asyncio
+import stat
+
+import pytest
+
+from submititnow.jt.scheduler import (
+    SACCT_CHUNK_SIZE,
+    SlurmBackend,
+    take_snapshot,
+    take_snapshot_async,
+)
+
+
+def _fake_command(path, script: str) -> str:
+    path.write_text("#!/bin/sh\n" + script)
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+@pytest.fixture
+def squeue(tmp_path, monkeypatch):
+    """Sets `SUBMITITNOW_SQUEUE` to a fake `squeue` printing the given script's output."""
+
+    def make(script: str):
+        monkeypatch.setenv("SUBMITITNOW_SQUEUE", _fake_command(tmp_path / "squeue", script))
+
+    return make
+
+
+@pytest.fixture
+def sacct(tmp_path, monkeypatch):
+    """Sets `SUBMITITNOW_SACCT` to a fake `sacct`, logging the arguments of each call."""
+    calls = tmp_path / "sacct_calls"
+
+    def make(script: str):
+        script = f'echo "$@" >> {calls}\n' + script
+        monkeypatch.setenv("SUBMITITNOW_SACCT", _fake_command(tmp_path / "sacct", script))
+
+    def read_calls():
+        return calls.read_text().splitlines() if calls.exists() else []
+
+    make.calls = read_calls
+    return make
+
+
+def test_snapshot_parses_squeue_and_sacct(squeue, sacct):
+    squeue("echo '100_1|RUNNING|node1|None'\necho '999_0|PENDING||Priority'\n")
+    sacct(
+        "echo '100_0|COMPLETED|node2|0:0|2024-01-01T10:00:00|2024-01-01T11:00:00'\n"
+        "echo '100_1|PENDING||0:0|Unknown|Unknown'\n"
+        "echo '101_0|CANCELLED by 1234|node3|0:15|2024-01-01T10:00:00|2024-01-01T10:05:00'\n"
+        "echo 'malformed line'\n"
+    )
+
+    snapshot = take_snapshot(["100_0", "100_1:3", "101_0"])
+
+    assert snapshot.complete
+    assert snapshot.queued_array_ids == {"100"}
+    assert snapshot.get_state("100_0") == "COMPLETED"
+    assert snapshot.get_info("100_0")["NodeList"] == "node2"
+    # squeue overrides the accounting of live jobs, packed points share their task's state.
+    assert snapshot.get_state("100_1:3") == "RUNNING"
+    assert snapshot.get_info("100_1")["End"] == "Unknown"
+    assert snapshot.get_state("101_0") == "CANCELLED"
+    assert snapshot.get_state("102_0") is None
+    assert sacct.calls() == [
+        "--noheader --parsable2 --allocations --jobs=100,101 "
+        "--format=JobID,State,NodeList,ExitCode,Start,End"
+    ]
+
+
+def test_sacct_is_queried_in_chunks(squeue, sacct):
+    squeue("")
+    sacct("echo '0_0|COMPLETED|node1|0:0|Unknown|Unknown'\n")
+    array_ids = [str(i) for i in range(2 * SACCT_CHUNK_SIZE + 1)]
+
+    rows = SlurmBackend().sacct(array_ids)
+
+    calls = sacct.calls()
+    assert len(rows) == len(calls) == 3
+    queried = [call.split("--jobs=")[1].split(" ")[0].split(",") for call in calls]
+    assert [len(chunk) for chunk in queried] == [SACCT_CHUNK_SIZE, SACCT_CHUNK_SIZE, 1]
+    assert sum(queried, []) == array_ids
+
+
+def test_empty_snapshot_does_not_query_the_scheduler(squeue, sacct):
+    squeue("exit 1\n")
+    sacct("exit 1\n")
+
+    assert take_snapshot([]).complete
+    assert SlurmBackend().sacct([]) == []
+    assert sacct.calls() == []
+
+
+def test_snapshot_is_incomplete_when_squeue_fails(squeue, sacct):
+    squeue("echo 'slurm_load_jobs error' >&2\nexit 1\n")
+    sacct("echo '100_0|FAILED|node1|1:0|Unknown|Unknown'\n")
+
+    snapshot = take_snapshot(["100_0"])
+
+    assert not snapshot.complete
+    assert snapshot.get_state("100_0") == "FAILED"
+
+
+def test_snapshot_is_incomplete_when_sacct_fails(squeue, sacct):
+    squeue("")
+    sacct("exit 1\n")
+
+    snapshot = take_snapshot(["100_0"])
+
+    assert not snapshot.complete
+    assert snapshot.jobs_info == {}
+
+
+def test_snapshot_is_incomplete_when_the_scheduler_times_out(squeue, sacct):
+    squeue("exec sleep 5\n")
+    sacct("")
+
+    backend = SlurmBackend(timeout=0.2)
+
+    assert backend.squeue() is None
+    assert not take_snapshot(["100_0"], backend).complete
+    assert not asyncio.run(take_snapshot_async(["100_0"], backend)).complete
+
+
+def test_missing_scheduler_commands(tmp_path):
+    backend = SlurmBackend(
+        squeue_cmd=str(tmp_path / "no_squeue"), sacct_cmd=str(tmp_path / "no_sacct")
+    )
+
+    assert backend.squeue() is None
+    assert backend.sacct(["100"]) is None
+    assert backend.sacct_usage(["100"]) == []
+    assert not take_snapshot(["100_0"], backend).complete
+
+
+def test_async_snapshot_matches_the_sync_one(squeue, sacct):
+    squeue("echo '100_1|RUNNING|node1|None'\n")
+    sacct("echo '100_0|COMPLETED|node2|0:0|Unknown|Unknown'\n")
+
+    snapshot = take_snapshot(["100_0", "100_1"])
+    async_snapshot = asyncio.run(take_snapshot_async(["100_0", "100_1"]))
+
+    assert async_snapshot.complete
+    assert async_snapshot.jobs_info == snapshot.jobs_info
+    assert async_snapshot.queued_array_ids == snapshot.queued_array_ids